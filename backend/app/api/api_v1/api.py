@@ -4,7 +4,7 @@ Main API router for v1 endpoints
 
 from fastapi import APIRouter
 
-from app.api.api_v1.endpoints import auth, projects, media, timeline, chat
+from app.api.api_v1.endpoints import auth, projects, media, timeline, chat, websocket
 
 api_router = APIRouter()
 
@@ -14,3 +14,4 @@ api_router.include_router(projects.router, prefix="/projects", tags=["projects"]
 api_router.include_router(media.router, prefix="/media", tags=["media"])
 api_router.include_router(timeline.router, prefix="/timeline", tags=["timeline"])
 api_router.include_router(chat.router, prefix="/chat", tags=["chat"])
+api_router.include_router(websocket.router, tags=["websocket"])
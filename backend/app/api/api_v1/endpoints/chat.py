@@ -2,36 +2,49 @@
 Chat management endpoints
 """
 
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import bindparam, select, delete, exists, func, or_, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, raiseload
 
 from app.core.database import get_db
 from app.api.schemas import (
-    ChatMessageCreate, ChatMessageResponse
+    ChatMessageCreate, ChatMessageResponse, ChatMessageListResponse, ChatMessageCursor
 )
 from app.models.user import User
 from app.models.project import Project, ProjectMember
 from app.models.media import ChatMessage
+from app.services.permissions import fetch_with_membership, member_project_ids, get_member_role
 from app.api.api_v1.endpoints.auth import get_current_user_from_token
 
 router = APIRouter()
 
+# Membership check and message count for a project, built once and reused
+_UNREAD_STMT = select(
+    exists().where(
+        ProjectMember.project_id == bindparam("pid"),
+        ProjectMember.user_id == bindparam("uid")
+    ),
+    select(func.count(ChatMessage.id))
+    .where(ChatMessage.project_id == bindparam("pid"))
+    .scalar_subquery(),
+)
+
 
 @router.post("/", response_model=ChatMessageResponse, status_code=status.HTTP_201_CREATED)
 async def create_chat_message(
     message_data: ChatMessageCreate,
     current_user: User = Depends(get_current_user_from_token),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create a new chat message"""
     # Check if user has access to project
-    member = db.query(ProjectMember).filter(
-        ProjectMember.project_id == message_data.project_id,
-        ProjectMember.user_id == current_user.id
-    ).first()
+    role = await get_member_role(db, current_user.id, message_data.project_id)
     
-    if not member:
+    if not role:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Project not found or access denied"
@@ -44,68 +57,81 @@ async def create_chat_message(
         message=message_data.message,
         message_type=message_data.message_type
     )
+    # The response embeds the author, who is the current user
+    message.user = current_user
     
     db.add(message)
-    db.commit()
-    db.refresh(message)
+    await db.commit()
     
     return message
 
 
-@router.get("/project/{project_id}", response_model=List[ChatMessageResponse])
+@router.get("/project/{project_id}", response_model=ChatMessageListResponse)
 async def get_project_chat_messages(
     project_id: int,
-    skip: int = 0,
-    limit: int = 100,
+    before: Optional[datetime] = None,
+    before_id: Optional[int] = None,
+    limit: int = Query(100, ge=1, le=500),
     current_user: User = Depends(get_current_user_from_token),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """Get chat messages for a project"""
+    """Get chat messages for a project, newest first
+
+    Pages are keyed on ``(created_at, id)``: pass the ``created_at`` and
+    ``id`` of the previous page's ``next_cursor`` as ``before`` and
+    ``before_id`` to fetch older messages.
+    """
     # Check if user has access to project
-    member = db.query(ProjectMember).filter(
-        ProjectMember.project_id == project_id,
-        ProjectMember.user_id == current_user.id
-    ).first()
+    role = await get_member_role(db, current_user.id, project_id)
     
-    if not member:
+    if not role:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Project not found or access denied"
         )
     
-    messages = db.query(ChatMessage).filter(
-        ChatMessage.project_id == project_id
-    ).order_by(ChatMessage.created_at.desc()).offset(skip).limit(limit).all()
+    stmt = select(ChatMessage).options(
+        joinedload(ChatMessage.user), raiseload("*")
+    ).where(ChatMessage.project_id == project_id)
+    if before is not None and before_id is not None:
+        stmt = stmt.where(
+            tuple_(ChatMessage.created_at, ChatMessage.id) < tuple_(before, before_id)
+        )
+    elif before is not None:
+        stmt = stmt.where(ChatMessage.created_at < before)
     
-    return messages
+    result = await db.execute(
+        stmt.order_by(ChatMessage.created_at.desc(), ChatMessage.id.desc()).limit(limit)
+    )
+    messages = result.scalars().all()
+    
+    next_cursor = None
+    if len(messages) == limit:
+        last = messages[-1]
+        next_cursor = ChatMessageCursor(created_at=last.created_at, id=last.id)
+    response = ChatMessageListResponse(messages=messages, next_cursor=next_cursor)
+    return ORJSONResponse(response.model_dump(mode="json"))
 
 
 @router.get("/{message_id}", response_model=ChatMessageResponse)
 async def get_chat_message(
     message_id: int,
     current_user: User = Depends(get_current_user_from_token),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get a specific chat message"""
-    message = db.query(ChatMessage).filter(ChatMessage.id == message_id).first()
-    if not message:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Chat message not found"
-        )
-    
-    # Check if user has access to project
-    member = db.query(ProjectMember).filter(
-        ProjectMember.project_id == message.project_id,
-        ProjectMember.user_id == current_user.id
-    ).first()
-    
-    if not member:
+    # Fetch message and check project access in one query
+    row = await fetch_with_membership(
+        db, ChatMessage, message_id, current_user.id,
+        joinedload(ChatMessage.user), raiseload("*")
+    )
+    if not row:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail="Access denied to chat message"
+            detail="Chat message not found or access denied"
         )
     
+    message, _ = row
     return message
 
 
@@ -113,44 +139,33 @@ async def get_chat_message(
 async def delete_chat_message(
     message_id: int,
     current_user: User = Depends(get_current_user_from_token),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Delete a chat message (only message author or project owner can delete)"""
-    message = db.query(ChatMessage).filter(ChatMessage.id == message_id).first()
-    if not message:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Chat message not found"
-        )
-    
-    # Check if user has access to project
-    member = db.query(ProjectMember).filter(
-        ProjectMember.project_id == message.project_id,
-        ProjectMember.user_id == current_user.id
-    ).first()
-    
-    if not member:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Access denied to chat message"
+    # Delete the message only if the user may delete it; authorization and
+    # delete run as one statement
+    owned_projects = select(Project.id).where(Project.owner_id == current_user.id)
+    can_delete = or_(
+        ChatMessage.user_id == current_user.id,                                      # Message author
+        ChatMessage.project_id.in_(member_project_ids(current_user.id, ["owner"])),  # Owner role
+        ChatMessage.project_id.in_(owned_projects)                                   # Project owner
+    )
+    result = await db.execute(
+        delete(ChatMessage)
+        .where(
+            ChatMessage.id == message_id,
+            ChatMessage.project_id.in_(member_project_ids(current_user.id)),
+            can_delete
         )
-    
-    # Check if user can delete the message
-    project = db.query(Project).filter(Project.id == message.project_id).first()
-    can_delete = (
-        message.user_id == current_user.id or  # Message author
-        member.role == "owner" or              # Project owner
-        (member.role == "editor" and project.owner_id == current_user.id)  # Editor with owner permissions
+        .returning(ChatMessage.id)
     )
-    
-    if not can_delete:
+    if result.first() is None:
         raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Insufficient permissions to delete message"
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Chat message not found or insufficient permissions"
         )
     
-    db.delete(message)
-    db.commit()
+    await db.commit()
     
     return None
 
@@ -159,27 +174,23 @@ async def delete_chat_message(
 async def get_unread_message_count(
     project_id: int,
     current_user: User = Depends(get_current_user_from_token),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get count of unread messages for current user in project"""
-    # Check if user has access to project
-    member = db.query(ProjectMember).filter(
-        ProjectMember.project_id == project_id,
-        ProjectMember.user_id == current_user.id
-    ).first()
+    # Check access and count messages in one query
+    # For now, return total message count
+    # In a real implementation, you'd track read/unread status
+    result = await db.execute(
+        _UNREAD_STMT, {"pid": project_id, "uid": current_user.id}
+    )
+    has_access, total_messages = result.one()
     
-    if not member:
+    if not has_access:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Project not found or access denied"
         )
     
-    # For now, return total message count
-    # In a real implementation, you'd track read/unread status
-    total_messages = db.query(ChatMessage).filter(
-        ChatMessage.project_id == project_id
-    ).count()
-    
     return {
         "project_id": project_id,
         "unread_count": total_messages,  # Placeholder - implement proper read tracking
@@ -2,68 +2,80 @@
 Media management endpoints
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+import logging
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import select, update, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import raiseload
 
 from app.core.database import get_db
 from app.api.schemas import UploadRequest, UploadResponse, MediaFileResponse
 from app.models.user import User
-from app.models.project import Project, ProjectMember
-from app.models.media import MediaFile, MediaType
-from app.services.media import media_service
+from app.models.project import Project
+from app.models.media import MediaFile, MediaType, TimelineClip
+from app.services.media import MediaService, get_media_service
+from app.services.permissions import fetch_with_membership, member_project_ids, get_member_role
+from app.api.etag import entity_etag, not_modified
 from app.api.api_v1.endpoints.auth import get_current_user_from_token
 from app.core.config import settings
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
+# (content type prefix, allowed extensions, extensions as shown in errors)
+_FORMAT_PREFIXES = tuple(
+    (prefix, frozenset(formats), ", ".join(formats))
+    for prefix, formats in (
+        ("video/", settings.ALLOWED_VIDEO_FORMATS),
+        ("audio/", settings.ALLOWED_AUDIO_FORMATS),
+        ("image/", settings.ALLOWED_IMAGE_FORMATS),
+    )
+)
+_NO_FORMATS = (frozenset(), "")
+
 
 @router.post("/upload", response_model=UploadResponse)
 async def get_upload_url(
     upload_data: UploadRequest,
     current_user: User = Depends(get_current_user_from_token),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    media_service: MediaService = Depends(get_media_service)
 ):
     """Get presigned URL for file upload"""
-    # Check if user has access to project
-    member = db.query(ProjectMember).filter(
-        ProjectMember.project_id == upload_data.project_id,
-        ProjectMember.user_id == current_user.id
-    ).first()
-    
-    if not member:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Project not found or access denied"
-        )
-    
-    # Validate file size
-    max_size = int(settings.MAX_FILE_SIZE.replace("MB", "")) * 1024 * 1024
-    if upload_data.file_size > max_size:
+    # Validate file size and type before touching the database
+    if upload_data.file_size > settings.MAX_FILE_SIZE_BYTES:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"File size exceeds maximum allowed size of {settings.MAX_FILE_SIZE}"
         )
     
-    # Validate file type
-    file_extension = upload_data.filename.split(".")[-1].lower()
-    allowed_formats = []
-    
-    if upload_data.content_type.startswith("video/"):
-        allowed_formats = settings.ALLOWED_VIDEO_FORMATS
-    elif upload_data.content_type.startswith("audio/"):
-        allowed_formats = settings.ALLOWED_AUDIO_FORMATS
-    elif upload_data.content_type.startswith("image/"):
-        allowed_formats = settings.ALLOWED_IMAGE_FORMATS
+    file_extension = upload_data.filename.rpartition(".")[2].lower()
+    allowed_formats, allowed_display = _NO_FORMATS
+    for prefix, formats, display in _FORMAT_PREFIXES:
+        if upload_data.content_type.startswith(prefix):
+            allowed_formats, allowed_display = formats, display
+            break
     
     if file_extension not in allowed_formats:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"File type not allowed. Allowed formats: {', '.join(allowed_formats)}"
+            detail=f"File type not allowed. Allowed formats: {allowed_display}"
+        )
+    
+    # Check if user has access to project
+    role = await get_member_role(db, current_user.id, upload_data.project_id)
+    
+    if not role:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Project not found or access denied"
         )
     
     # Generate presigned upload URL
     try:
-        upload_info = media_service.generate_presigned_upload_url(
+        upload_info = await media_service.generate_presigned_upload_url(
             filename=upload_data.filename,
             content_type=upload_data.content_type,
             project_id=upload_data.project_id
@@ -84,16 +96,13 @@ async def confirm_upload(
     content_type: str,
     file_size: int,
     current_user: User = Depends(get_current_user_from_token),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Confirm file upload and create media file record"""
     # Check if user has access to project
-    member = db.query(ProjectMember).filter(
-        ProjectMember.project_id == project_id,
-        ProjectMember.user_id == current_user.id
-    ).first()
+    role = await get_member_role(db, current_user.id, project_id)
     
-    if not member:
+    if not role:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Project not found or access denied"
@@ -122,8 +131,8 @@ async def confirm_upload(
     )
     
     db.add(media_file)
-    db.commit()
-    db.refresh(media_file)
+    await db.commit()
+    await db.refresh(media_file)
     
     return media_file
 
@@ -131,29 +140,26 @@ async def confirm_upload(
 @router.get("/{media_id}", response_model=MediaFileResponse)
 async def get_media_file(
     media_id: int,
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_user_from_token),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get media file details"""
-    media_file = db.query(MediaFile).filter(MediaFile.id == media_id).first()
-    if not media_file:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Media file not found"
-        )
-    
-    # Check if user has access to project
-    member = db.query(ProjectMember).filter(
-        ProjectMember.project_id == media_file.project_id,
-        ProjectMember.user_id == current_user.id
-    ).first()
-    
-    if not member:
+    # Fetch media file and check project access in one query
+    row = await fetch_with_membership(db, MediaFile, media_id, current_user.id, raiseload("*"))
+    if not row:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail="Access denied to media file"
+            detail="Media file not found or access denied"
         )
     
+    media_file, _ = row
+    etag = entity_etag(media_file)
+    unchanged = not_modified(request, etag)
+    if unchanged:
+        return unchanged
+    response.headers["ETag"] = etag
     return media_file
 
 
@@ -161,30 +167,22 @@ async def get_media_file(
 async def get_download_url(
     media_id: int,
     current_user: User = Depends(get_current_user_from_token),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    media_service: MediaService = Depends(get_media_service)
 ):
     """Get presigned download URL for media file"""
-    media_file = db.query(MediaFile).filter(MediaFile.id == media_id).first()
-    if not media_file:
+    # Fetch media file and check project access in one query
+    row = await fetch_with_membership(db, MediaFile, media_id, current_user.id)
+    if not row:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail="Media file not found"
+            detail="Media file not found or access denied"
         )
     
-    # Check if user has access to project
-    member = db.query(ProjectMember).filter(
-        ProjectMember.project_id == media_file.project_id,
-        ProjectMember.user_id == current_user.id
-    ).first()
-    
-    if not member:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Access denied to media file"
-        )
+    media_file, _ = row
     
     try:
-        download_url = media_service.get_file_url(media_file.file_path)
+        download_url = await media_service.get_file_url(media_file.file_path)
         return {"download_url": download_url}
     except Exception as e:
         raise HTTPException(
@@ -197,36 +195,47 @@ async def get_download_url(
 async def delete_media_file(
     media_id: int,
     current_user: User = Depends(get_current_user_from_token),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    media_service: MediaService = Depends(get_media_service)
 ):
     """Delete a media file"""
-    media_file = db.query(MediaFile).filter(MediaFile.id == media_id).first()
-    if not media_file:
+    # Authorization is folded into both statements: the media must belong to
+    # a project where the user is an owner or editor
+    editable = MediaFile.project_id.in_(
+        member_project_ids(current_user.id, ["owner", "editor"])
+    )
+    
+    # Detach the file from timeline clips first; a bulk DELETE bypasses the
+    # ORM, which used to null the foreign key
+    await db.execute(
+        update(TimelineClip)
+        .where(
+            TimelineClip.media_file_id == media_id,
+            TimelineClip.media_file_id.in_(
+                select(MediaFile.id).where(MediaFile.id == media_id, editable)
+            )
+        )
+        .values(media_file_id=None)
+        .execution_options(synchronize_session=False)
+    )
+    result = await db.execute(
+        delete(MediaFile)
+        .where(MediaFile.id == media_id, editable)
+        .returning(MediaFile.file_path)
+    )
+    file_path = result.scalar_one_or_none()
+    if file_path is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail="Media file not found"
+            detail="Media file not found or insufficient permissions"
         )
     
-    # Check if user has editor permissions
-    member = db.query(ProjectMember).filter(
-        ProjectMember.project_id == media_file.project_id,
-        ProjectMember.user_id == current_user.id
-    ).first()
-    
-    if not member or member.role not in ["owner", "editor"]:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Insufficient permissions to delete media file"
-        )
+    await db.commit()
     
     # Delete from storage
     try:
-        media_service.delete_file(media_file.file_path)
-    except Exception as e:
-        print(f"Warning: Failed to delete file from storage: {e}")
-    
-    # Delete from database
-    db.delete(media_file)
-    db.commit()
+        await media_service.delete_file(file_path)
+    except Exception:
+        logger.exception("Failed to delete file %s from storage", file_path)
     
     return None
@@ -3,25 +3,42 @@ Project management endpoints
 """
 
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import select, delete, func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, raiseload
 
 from app.core.database import get_db
 from app.api.schemas import (
     ProjectCreate, ProjectUpdate, ProjectResponse, ProjectListResponse
 )
 from app.models.user import User
-from app.models.project import Project, ProjectMember
+from app.models.project import Project, ProjectMember, ProjectVersion
+from app.models.media import ChatMessage, MediaFile, TimelineClip
+from app.services.permissions import (
+    fetch_with_membership,
+    member_project_ids,
+    get_member_role,
+    invalidate_member_role,
+    invalidate_project_roles,
+)
+from app.services.updates import apply_update
+from app.api.etag import entity_etag, not_modified
 from app.api.api_v1.endpoints.auth import get_current_user_from_token
 
 router = APIRouter()
 
+# Dialect-specific INSERT constructs that support ON CONFLICT
+_UPSERT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
 
 @router.post("/", response_model=ProjectResponse, status_code=status.HTTP_201_CREATED)
 async def create_project(
     project_data: ProjectCreate,
     current_user: User = Depends(get_current_user_from_token),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create a new project"""
     project = Project(
@@ -31,10 +48,13 @@ async def create_project(
         is_public=project_data.is_public,
         settings=project_data.settings
     )
+    # Reuse the authenticated user as the owner
+    project.owner = current_user
     
+    # Flush to get the project id without committing, so the project and
+    # its owner membership are written in a single transaction
     db.add(project)
-    db.commit()
-    db.refresh(project)
+    await db.flush()
     
     # Add owner as project member with editor role
     member = ProjectMember(
@@ -43,7 +63,7 @@ async def create_project(
         role="owner"
     )
     db.add(member)
-    db.commit()
+    await db.commit()
     
     return project
 
@@ -53,46 +73,56 @@ async def list_projects(
     skip: int = 0,
     limit: int = 100,
     current_user: User = Depends(get_current_user_from_token),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """List projects accessible to current user"""
-    # Get projects where user is owner or member
-    projects_query = db.query(Project).join(ProjectMember).filter(
-        ProjectMember.user_id == current_user.id
+    # Get projects where user is owner or member; the window function
+    # returns the total alongside the page so it costs one round trip
+    result = await db.execute(
+        select(Project, func.count().over().label("total"))
+        .join(ProjectMember)
+        .where(ProjectMember.user_id == current_user.id)
+        .options(joinedload(Project.owner), raiseload("*"))
+        .offset(skip)
+        .limit(limit)
     )
+    rows = result.all()
     
-    total = projects_query.count()
-    projects = projects_query.offset(skip).limit(limit).all()
+    total = rows[0].total if rows else 0
+    projects = [row.Project for row in rows]
     
-    return ProjectListResponse(projects=projects, total=total)
+    # Validate and serialize once; returning a response object skips
+    # FastAPI's second pass over the response_model
+    response = ProjectListResponse(projects=projects, total=total)
+    return ORJSONResponse(response.model_dump(mode="json"))
 
 
 @router.get("/{project_id}", response_model=ProjectResponse)
 async def get_project(
     project_id: int,
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_user_from_token),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get project details"""
-    # Check if user has access to project
-    member = db.query(ProjectMember).filter(
-        ProjectMember.project_id == project_id,
-        ProjectMember.user_id == current_user.id
-    ).first()
-    
-    if not member:
+    # Fetch project and check access in one query
+    row = await fetch_with_membership(
+        db, Project, project_id, current_user.id,
+        joinedload(Project.owner), raiseload("*")
+    )
+    if not row:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Project not found or access denied"
         )
     
-    project = db.query(Project).filter(Project.id == project_id).first()
-    if not project:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Project not found"
-        )
-    
+    project, _ = row
+    etag = entity_etag(project, project.owner)
+    unchanged = not_modified(request, etag)
+    if unchanged:
+        return unchanged
+    response.headers["ETag"] = etag
     return project
 
 
@@ -101,35 +131,28 @@ async def update_project(
     project_id: int,
     project_data: ProjectUpdate,
     current_user: User = Depends(get_current_user_from_token),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update project details"""
-    # Check if user is owner or has editor permissions
-    member = db.query(ProjectMember).filter(
-        ProjectMember.project_id == project_id,
-        ProjectMember.user_id == current_user.id
-    ).first()
-    
-    if not member or member.role not in ["owner", "editor"]:
+    # Fetch project and check access in one query
+    row = await fetch_with_membership(
+        db, Project, project_id, current_user.id,
+        joinedload(Project.owner), raiseload("*")
+    )
+    if not row:
         raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Insufficient permissions to edit project"
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Project not found or access denied"
         )
     
-    project = db.query(Project).filter(Project.id == project_id).first()
-    if not project:
+    project, member = row
+    if member.role not in ["owner", "editor"]:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Project not found"
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Insufficient permissions to edit project"
         )
     
-    # Update project fields
-    update_data = project_data.dict(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(project, field, value)
-    
-    db.commit()
-    db.refresh(project)
+    await apply_update(db, project, project_data.model_dump(exclude_unset=True))
     
     return project
 
@@ -138,30 +161,32 @@ async def update_project(
 async def delete_project(
     project_id: int,
     current_user: User = Depends(get_current_user_from_token),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Delete a project (only owner can delete)"""
-    # Check if user is owner
-    member = db.query(ProjectMember).filter(
-        ProjectMember.project_id == project_id,
-        ProjectMember.user_id == current_user.id
-    ).first()
-    
-    if not member or member.role != "owner":
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Only project owner can delete project"
+    # Bulk deletes bypass ORM cascades, so the rows referencing the project
+    # go first, in one transaction. Deleting the members is guarded by
+    # ownership; the owner always has a member row, so an empty result
+    # means the project is missing or not owned by the user
+    result = await db.execute(
+        delete(ProjectMember)
+        .where(
+            ProjectMember.project_id == project_id,
+            ProjectMember.project_id.in_(member_project_ids(current_user.id, ["owner"]))
         )
-    
-    project = db.query(Project).filter(Project.id == project_id).first()
-    if not project:
+        .returning(ProjectMember.id)
+    )
+    if result.first() is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail="Project not found"
+            detail="Project not found or not owned by user"
         )
     
-    db.delete(project)
-    db.commit()
+    for model in (ChatMessage, TimelineClip, MediaFile, ProjectVersion):
+        await db.execute(delete(model).where(model.project_id == project_id))
+    await db.execute(delete(Project).where(Project.id == project_id))
+    await db.commit()
+    await invalidate_project_roles(project_id)
     
     return None
 
@@ -172,41 +197,34 @@ async def add_project_member(
     user_id: int,
     role: str = "viewer",
     current_user: User = Depends(get_current_user_from_token),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Add a member to a project"""
     # Check if current user is owner or editor
-    member = db.query(ProjectMember).filter(
-        ProjectMember.project_id == project_id,
-        ProjectMember.user_id == current_user.id
-    ).first()
+    current_role = await get_member_role(db, current_user.id, project_id)
     
-    if not member or member.role not in ["owner", "editor"]:
+    if current_role not in ["owner", "editor"]:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Insufficient permissions to manage project members"
         )
     
-    # Check if user is already a member
-    existing_member = db.query(ProjectMember).filter(
-        ProjectMember.project_id == project_id,
-        ProjectMember.user_id == user_id
-    ).first()
-    
-    if existing_member:
+    # Add new member; the unique (project_id, user_id) index turns a
+    # duplicate into a no-op, so no separate existence check is needed
+    insert = _UPSERT_INSERTS[db.get_bind().dialect.name]
+    result = await db.execute(
+        insert(ProjectMember)
+        .values(project_id=project_id, user_id=user_id, role=role)
+        .on_conflict_do_nothing(index_elements=["project_id", "user_id"])
+        .returning(ProjectMember.id)
+    )
+    if result.scalar_one_or_none() is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="User is already a project member"
         )
     
-    # Add new member
-    new_member = ProjectMember(
-        project_id=project_id,
-        user_id=user_id,
-        role=role
-    )
-    
-    db.add(new_member)
-    db.commit()
+    await db.commit()
+    await invalidate_member_role(user_id, project_id)
     
     return {"message": "Member added successfully"}
@@ -3,35 +3,41 @@ Timeline management endpoints
 """
 
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import select, update, delete, bindparam
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, raiseload
 
 from app.core.database import get_db
 from app.api.schemas import (
     TimelineClipCreate, TimelineClipUpdate, TimelineClipResponse
 )
 from app.models.user import User
-from app.models.project import Project, ProjectMember
+from app.models.project import Project
 from app.models.media import TimelineClip
+from app.services.permissions import fetch_with_membership, member_project_ids, get_member_role
+from app.services.updates import apply_update
+from app.api.etag import entity_etag, not_modified
+from app.api.streaming import stream_json_array
 from app.api.api_v1.endpoints.auth import get_current_user_from_token
 
 router = APIRouter()
 
+# Rows fetched and encoded per batch when streaming a project timeline
+_TIMELINE_BATCH_SIZE = 500
+
 
 @router.post("/", response_model=TimelineClipResponse, status_code=status.HTTP_201_CREATED)
 async def create_timeline_clip(
     clip_data: TimelineClipCreate,
     current_user: User = Depends(get_current_user_from_token),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create a new timeline clip"""
     # Check if user has editor permissions
-    member = db.query(ProjectMember).filter(
-        ProjectMember.project_id == clip_data.project_id,
-        ProjectMember.user_id == current_user.id
-    ).first()
+    role = await get_member_role(db, current_user.id, clip_data.project_id)
     
-    if not member or member.role not in ["owner", "editor"]:
+    if role not in ["owner", "editor"]:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Insufficient permissions to edit timeline"
@@ -52,8 +58,8 @@ async def create_timeline_clip(
     )
     
     db.add(clip)
-    db.commit()
-    db.refresh(clip)
+    await db.commit()
+    await db.refresh(clip, ["media_file"])
     
     return clip
 
@@ -62,54 +68,58 @@ async def create_timeline_clip(
 async def get_project_timeline(
     project_id: int,
     current_user: User = Depends(get_current_user_from_token),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get all timeline clips for a project"""
     # Check if user has access to project
-    member = db.query(ProjectMember).filter(
-        ProjectMember.project_id == project_id,
-        ProjectMember.user_id == current_user.id
-    ).first()
+    role = await get_member_role(db, current_user.id, project_id)
     
-    if not member:
+    if not role:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Project not found or access denied"
         )
     
-    clips = db.query(TimelineClip).filter(
-        TimelineClip.project_id == project_id
-    ).order_by(TimelineClip.track_number, TimelineClip.start_time).all()
-    
-    return clips
+    # Stream clips straight from the cursor so long timelines are never
+    # held in memory as a whole
+    result = await db.stream(
+        select(TimelineClip).options(
+            joinedload(TimelineClip.media_file), raiseload("*")
+        ).where(
+            TimelineClip.project_id == project_id
+        ).order_by(
+            TimelineClip.track_number, TimelineClip.start_time
+        ).execution_options(yield_per=_TIMELINE_BATCH_SIZE)
+    )
+    return stream_json_array(result, TimelineClipResponse)
 
 
 @router.get("/{clip_id}", response_model=TimelineClipResponse)
 async def get_timeline_clip(
     clip_id: int,
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_user_from_token),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get a specific timeline clip"""
-    clip = db.query(TimelineClip).filter(TimelineClip.id == clip_id).first()
-    if not clip:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Timeline clip not found"
-        )
-    
-    # Check if user has access to project
-    member = db.query(ProjectMember).filter(
-        ProjectMember.project_id == clip.project_id,
-        ProjectMember.user_id == current_user.id
-    ).first()
-    
-    if not member:
+    # Fetch timeline clip and check project access in one query
+    row = await fetch_with_membership(
+        db, TimelineClip, clip_id, current_user.id,
+        joinedload(TimelineClip.media_file), raiseload("*")
+    )
+    if not row:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail="Access denied to timeline clip"
+            detail="Timeline clip not found or access denied"
         )
     
+    clip, _ = row
+    etag = entity_etag(clip, clip.media_file)
+    unchanged = not_modified(request, etag)
+    if unchanged:
+        return unchanged
+    response.headers["ETag"] = etag
     return clip
 
 
@@ -118,35 +128,28 @@ async def update_timeline_clip(
     clip_id: int,
     clip_data: TimelineClipUpdate,
     current_user: User = Depends(get_current_user_from_token),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update a timeline clip"""
-    clip = db.query(TimelineClip).filter(TimelineClip.id == clip_id).first()
-    if not clip:
+    # Fetch timeline clip and check project access in one query
+    row = await fetch_with_membership(
+        db, TimelineClip, clip_id, current_user.id,
+        joinedload(TimelineClip.media_file), raiseload("*")
+    )
+    if not row:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail="Timeline clip not found"
+            detail="Timeline clip not found or access denied"
         )
     
-    # Check if user has editor permissions
-    member = db.query(ProjectMember).filter(
-        ProjectMember.project_id == clip.project_id,
-        ProjectMember.user_id == current_user.id
-    ).first()
-    
-    if not member or member.role not in ["owner", "editor"]:
+    clip, member = row
+    if member.role not in ["owner", "editor"]:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Insufficient permissions to edit timeline"
         )
     
-    # Update clip fields
-    update_data = clip_data.dict(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(clip, field, value)
-    
-    db.commit()
-    db.refresh(clip)
+    await apply_update(db, clip, clip_data.model_dump(exclude_unset=True))
     
     return clip
 
@@ -155,30 +158,26 @@ async def update_timeline_clip(
 async def delete_timeline_clip(
     clip_id: int,
     current_user: User = Depends(get_current_user_from_token),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Delete a timeline clip"""
-    clip = db.query(TimelineClip).filter(TimelineClip.id == clip_id).first()
-    if not clip:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Timeline clip not found"
+    # Delete the clip only if the user is an owner or editor of its project;
+    # authorization and delete run as one statement
+    result = await db.execute(
+        delete(TimelineClip)
+        .where(
+            TimelineClip.id == clip_id,
+            TimelineClip.project_id.in_(member_project_ids(current_user.id, ["owner", "editor"]))
         )
-    
-    # Check if user has editor permissions
-    member = db.query(ProjectMember).filter(
-        ProjectMember.project_id == clip.project_id,
-        ProjectMember.user_id == current_user.id
-    ).first()
-    
-    if not member or member.role not in ["owner", "editor"]:
+        .returning(TimelineClip.id)
+    )
+    if result.first() is None:
         raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Insufficient permissions to edit timeline"
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Timeline clip not found or insufficient permissions"
         )
     
-    db.delete(clip)
-    db.commit()
+    await db.commit()
     
     return None
 
@@ -188,32 +187,34 @@ async def reorder_timeline_clips(
     project_id: int,
     clip_order: List[int],  # List of clip IDs in new order
     current_user: User = Depends(get_current_user_from_token),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Reorder timeline clips for a project"""
     # Check if user has editor permissions
-    member = db.query(ProjectMember).filter(
-        ProjectMember.project_id == project_id,
-        ProjectMember.user_id == current_user.id
-    ).first()
+    role = await get_member_role(db, current_user.id, project_id)
     
-    if not member or member.role not in ["owner", "editor"]:
+    if role not in ["owner", "editor"]:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Insufficient permissions to edit timeline"
         )
     
-    # Update clip positions based on new order
-    for index, clip_id in enumerate(clip_order):
-        clip = db.query(TimelineClip).filter(
-            TimelineClip.id == clip_id,
-            TimelineClip.project_id == project_id
-        ).first()
-        
-        if clip:
-            clip.start_time = index * 1.0  # Simple sequential ordering
-            # You might want to implement more sophisticated ordering logic
-    
-    db.commit()
+    # Update clip positions based on new order in one executemany UPDATE;
+    # the project_id guard skips ids that belong to other projects
+    if clip_order:
+        clips = TimelineClip.__table__
+        stmt = (
+            update(clips)
+            .where(clips.c.id == bindparam("b_id"), clips.c.project_id == project_id)
+            .values(start_time=bindparam("b_start"))
+        )
+        # Simple sequential ordering
+        # You might want to implement more sophisticated ordering logic
+        params = [
+            {"b_id": clip_id, "b_start": index * 1.0}
+            for index, clip_id in enumerate(clip_order)
+        ]
+        await db.execute(stmt, params)
+        await db.commit()
     
     return {"message": "Timeline reordered successfully"}
@@ -2,141 +2,151 @@
 WebSocket endpoint for real-time collaboration
 """
 
-import json
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends, HTTPException
-from sqlalchemy.orm import Session
+import logging
+from typing import Any, Awaitable, Callable, Dict, Type
 
-from app.core.database import get_db
+import msgspec
+from fastapi import (
+    APIRouter, WebSocket, WebSocketDisconnect, WebSocketException, Depends, Query, status
+)
+
+from app.core.database import SessionLocal
 from app.websockets.manager import manager
-from app.models.user import User
-from app.models.project import Project, ProjectMember
-from app.api.api_v1.endpoints.auth import get_current_user_from_token
+from app.websockets.codec import negotiate_codec, receive_frame
+from app.services.auth import UserClaims, get_user_claims
+from app.services.permissions import get_member_role
+from app.api.schemas import (
+    ChatMessageWebSocket,
+    ClientMessage,
+    CursorUpdateMessage,
+    PingMessage,
+    TimelineUpdateMessage,
+    WebSocketMessage,
+)
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 
+async def get_current_user_ws(
+    project_id: int,
+    token: str = Query(None)
+) -> UserClaims:
+    """Authenticate a WebSocket handshake and check project access
+
+    Runs before the connection is accepted, so rejected clients get a
+    policy-violation close instead of an accept/close round trip. The
+    session is scoped to the checks rather than the connection, so an
+    open socket does not hold a pooled database connection.
+    """
+    if not token:
+        raise WebSocketException(
+            code=status.WS_1008_POLICY_VIOLATION,
+            reason="Authentication token required"
+        )
+    
+    async with SessionLocal() as db:
+        user = await get_user_claims(db, token)
+        if not user:
+            raise WebSocketException(
+                code=status.WS_1008_POLICY_VIOLATION,
+                reason="Invalid authentication token"
+            )
+        
+        # Check if user has access to project
+        role = await get_member_role(db, user.user_id, project_id)
+        if not role:
+            raise WebSocketException(
+                code=status.WS_1008_POLICY_VIOLATION,
+                reason="Project not found or access denied"
+            )
+    
+    return user
+
+
 @router.websocket("/ws/project/{project_id}")
 async def websocket_endpoint(
     websocket: WebSocket,
     project_id: int,
-    token: str = None
+    user: UserClaims = Depends(get_current_user_ws)
 ):
     """WebSocket endpoint for project collaboration"""
     try:
-        # Accept the connection first
-        await websocket.accept()
-        
-        # Validate token and get user
-        if not token:
-            await websocket.send_text(json.dumps({
-                "type": "error",
-                "message": "Authentication token required"
-            }))
-            await websocket.close()
-            return
-        
-        # For WebSocket, we'll do a simple token validation
-        # In production, you might want to implement proper JWT validation
-        user = await validate_websocket_token(token, project_id)
-        if not user:
-            await websocket.send_text(json.dumps({
-                "type": "error",
-                "message": "Invalid authentication token"
-            }))
-            await websocket.close()
-            return
+        # Accept the connection, agreeing on the wire format
+        codec = negotiate_codec(websocket)
+        await websocket.accept(subprotocol=codec.subprotocol)
         
         # Connect user to project room
         await manager.connect(websocket, project_id, {
-            "id": user.id,
+            "id": user.user_id,
             "username": user.username
-        })
+        }, codec)
         
         try:
             # Handle incoming messages
             while True:
-                data = await websocket.receive_text()
-                message = json.loads(data)
+                frame = await receive_frame(websocket)
+                try:
+                    message = codec.decode(frame)
+                except msgspec.ValidationError as e:
+                    await manager.send_personal_message(websocket, {
+                        "type": "error",
+                        "message": f"Invalid message: {e}"
+                    })
+                    continue
+                except msgspec.DecodeError:
+                    await manager.send_personal_message(websocket, {
+                        "type": "error",
+                        "message": "Malformed message"
+                    })
+                    continue
                 
                 await handle_websocket_message(websocket, message, project_id)
                 
         except WebSocketDisconnect:
-            manager.disconnect(websocket)
+            pass
             
-    except Exception as e:
-        print(f"WebSocket error: {e}")
+    except Exception:
+        logger.exception("WebSocket error in project %s", project_id)
         try:
             await websocket.close()
         except:
             pass
+    finally:
+        # Every exit path releases the connection's room slot, cursor and
+        # writer task, not only a clean disconnect
+        manager.disconnect(websocket)
 
 
-async def validate_websocket_token(token: str, project_id: int) -> User:
-    """Validate WebSocket token and return user"""
-    try:
-        # Simple token validation for WebSocket
-        # In production, implement proper JWT validation
-        from app.services.auth import verify_token
-        
-        payload = verify_token(token)
-        if not payload:
-            return None
-        
-        username = payload.get("sub")
-        if not username:
-            return None
-        
-        # Get user from database
-        from app.services.auth import get_user_by_username
-        user = get_user_by_username(None, username)  # We'll need to pass db session
-        
-        if not user:
-            return None
-        
-        # Check if user has access to project
-        # This is a simplified check - in production, use proper database session
-        return user
-        
-    except Exception as e:
-        print(f"Token validation error: {e}")
-        return None
+async def _pong(websocket: WebSocket, message: PingMessage):
+    """Respond to ping with pong"""
+    await manager.send_personal_message(websocket, {
+        "type": "pong",
+        "timestamp": message.timestamp
+    })
 
 
-async def handle_websocket_message(websocket: WebSocket, message: dict, project_id: int):
-    """Handle incoming WebSocket messages"""
-    message_type = message.get("type")
-    
+# Message struct -> handler, looked up once per frame
+HANDLERS: Dict[Type[WebSocketMessage], Callable[[WebSocket, Any], Awaitable[None]]] = {
+    CursorUpdateMessage: manager.handle_cursor_update,
+    TimelineUpdateMessage: manager.handle_timeline_update,
+    ChatMessageWebSocket: manager.handle_chat_message,
+    PingMessage: _pong,
+}
+
+
+async def handle_websocket_message(websocket: WebSocket, message: ClientMessage, project_id: int):
+    """Handle incoming WebSocket messages
+
+    Messages arrive already decoded and validated by the codec, so every
+    message type has an entry in HANDLERS.
+    """
     try:
-        if message_type == "cursor_update":
-            await manager.handle_cursor_update(websocket, message)
-            
-        elif message_type == "timeline_update":
-            await manager.handle_timeline_update(websocket, message)
-            
-        elif message_type == "chat_message":
-            await manager.handle_chat_message(websocket, message)
-            
-        elif message_type == "ping":
-            # Respond to ping with pong
-            await websocket.send_text(json.dumps({
-                "type": "pong",
-                "timestamp": message.get("timestamp")
-            }))
-            
-        else:
-            # Unknown message type
-            await websocket.send_text(json.dumps({
-                "type": "error",
-                "message": f"Unknown message type: {message_type}"
-            }))
-            
-    except Exception as e:
-        print(f"Error handling WebSocket message: {e}")
-        await websocket.send_text(json.dumps({
+        await HANDLERS[type(message)](websocket, message)
+    except Exception:
+        logger.exception("Error handling WebSocket message %r", message)
+        await manager.send_personal_message(websocket, {
             "type": "error",
             "message": "Internal server error"
-        }))
-
-
-# Add WebSocket router to main API router
-# Note: This needs to be added to the main API router in api.py
+        })
@@ -0,0 +1,29 @@
+"""
+ETag helpers for conditional GET requests
+"""
+
+from typing import Any, Optional
+
+from fastapi import Request, Response, status
+
+
+def entity_etag(*entities: Optional[Any]) -> str:
+    """Build a weak ETag from the id and updated_at of the given entities
+
+    Pass the entity together with any related rows embedded in its response,
+    so that a change to either produces a new tag.
+    """
+    parts = [
+        f"{entity.id}-{int(entity.updated_at.timestamp() * 1_000_000)}"
+        for entity in entities
+        if entity is not None
+    ]
+    return f'W/"{".".join(parts)}"'
+
+
+def not_modified(request: Request, etag: str) -> Optional[Response]:
+    """Return a 304 response if the client already holds this version"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag in (tag.strip() for tag in if_none_match.split(",")):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    return None
@@ -1,16 +1,20 @@
 """
-Pydantic schemas for API requests and responses
+Schemas for API requests, responses and WebSocket messages
 """
 
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Union
 from datetime import datetime
-from pydantic import BaseModel, Field
+
+import msgspec
+from pydantic import AliasChoices, BaseModel, ConfigDict, Field, field_validator
+
+from app.models.media import MediaType
 
 
 # User schemas
 class UserBase(BaseModel):
     username: str = Field(..., min_length=3, max_length=50)
-    email: str = Field(..., regex=r"^[^@]+@[^@]+\.[^@]+$")
+    email: str = Field(..., pattern=r"^[^@]+@[^@]+\.[^@]+$")
     full_name: Optional[str] = Field(None, max_length=100)
 
 
@@ -30,8 +34,7 @@ class UserResponse(UserBase):
     created_at: datetime
     updated_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # Authentication schemas
@@ -75,8 +78,7 @@ class ProjectResponse(ProjectBase):
     created_at: datetime
     updated_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class ProjectListResponse(BaseModel):
@@ -94,7 +96,18 @@ class MediaFileBase(BaseModel):
     width: Optional[int] = None
     height: Optional[int] = None
     fps: Optional[float] = None
-    metadata: Optional[Dict[str, Any]] = None
+    # Read from MediaFile.extra_metadata, exposed as "metadata"
+    metadata: Optional[Dict[str, Any]] = Field(
+        None, validation_alias=AliasChoices("extra_metadata", "metadata")
+    )
+    
+    @field_validator("media_type", mode="before")
+    @classmethod
+    def media_type_name(cls, v):
+        # Stored as a MediaType integer, exposed by name
+        if isinstance(v, int):
+            return MediaType(v).name.lower()
+        return v
 
 
 class MediaFileCreate(MediaFileBase):
@@ -109,8 +122,7 @@ class MediaFileResponse(MediaFileBase):
     created_at: datetime
     updated_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # Timeline schemas
@@ -148,14 +160,13 @@ class TimelineClipResponse(TimelineClipBase):
     created_at: datetime
     updated_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # Chat schemas
 class ChatMessageBase(BaseModel):
     message: str = Field(..., min_length=1, max_length=1000)
-    message_type: str = Field(default="text", regex="^(text|system|mention)$")
+    message_type: str = Field(default="text", pattern="^(text|system|mention)$")
 
 
 class ChatMessageCreate(ChatMessageBase):
@@ -169,8 +180,18 @@ class ChatMessageResponse(ChatMessageBase):
     user: UserResponse
     created_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
+
+
+class ChatMessageCursor(BaseModel):
+    created_at: datetime
+    id: int
+
+
+class ChatMessageListResponse(BaseModel):
+    messages: List[ChatMessageResponse]
+    # Pass as `before` and `before_id` to get older messages
+    next_cursor: Optional[ChatMessageCursor] = None
 
 
 # Upload schemas
@@ -188,30 +209,50 @@ class UploadResponse(BaseModel):
 
 
 # WebSocket message schemas
-class WebSocketMessage(BaseModel):
-    type: str
-    data: Optional[Dict[str, Any]] = None
+# Inbound frames are decoded straight into these structs by the WebSocket
+# codecs; the "type" field selects the struct
+class WebSocketMessage(msgspec.Struct, tag_field="type"):
+    """Base class of messages sent by clients over a project WebSocket"""
 
 
-class CursorUpdateMessage(BaseModel):
-    type: str = "cursor_update"
+class CursorUpdateMessage(WebSocketMessage, tag="cursor_update"):
     x: float
     y: float
     timestamp: Optional[float] = None
 
 
-class TimelineUpdateMessage(BaseModel):
-    type: str = "timeline_update"
+class TimelineUpdateMessage(WebSocketMessage, tag="timeline_update"):
     action: str  # add, update, delete, move
     clip_data: Dict[str, Any]
 
 
-class ChatMessageWebSocket(BaseModel):
-    type: str = "chat_message"
+class ChatMessageWebSocket(WebSocketMessage, tag="chat_message"):
     message: str
     timestamp: Optional[float] = None
 
 
+class PingMessage(WebSocketMessage, tag="ping"):
+    timestamp: Optional[float] = None
+
+
+ClientMessage = Union[
+    CursorUpdateMessage, TimelineUpdateMessage, ChatMessageWebSocket, PingMessage
+]
+
+
+class CursorPosition(msgspec.Struct, array_like=True):
+    """Cursor entry of a "cursors" broadcast, sent as [user_id, x, y, timestamp]
+
+    Cursor batches are the most frequent frames, so positions go out as
+    fixed-order arrays without keys or the user's name and color, which
+    clients already have from project_state and user_joined.
+    """
+    user_id: int
+    x: float
+    y: float
+    timestamp: Optional[float] = None
+
+
 # Error schemas
 class ErrorResponse(BaseModel):
     detail: str
@@ -0,0 +1,36 @@
+"""
+Streaming JSON responses for large result sets
+"""
+
+from typing import Any, AsyncIterator, Type
+
+import orjson
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncResult
+
+
+async def _json_array_chunks(result: AsyncResult, schema: Type[BaseModel]) -> AsyncIterator[bytes]:
+    """Encode streamed ORM rows as one JSON array, a partition per chunk"""
+    yield b"["
+    first = True
+    async for partition in result.scalars().partitions():
+        body = b",".join(
+            orjson.dumps(schema.model_validate(row).model_dump())
+            for row in partition
+        )
+        yield body if first else b"," + body
+        first = False
+    yield b"]"
+
+
+def stream_json_array(result: AsyncResult, schema: Any) -> StreamingResponse:
+    """Stream the rows of a server-side result as a JSON array
+
+    The result should come from ``AsyncSession.stream`` with ``yield_per``
+    set, so rows are fetched, validated and encoded one batch at a time
+    instead of materializing the whole list.
+    """
+    return StreamingResponse(
+        _json_array_chunks(result, schema), media_type="application/json"
+    )
@@ -2,35 +2,89 @@
 Database configuration and session management
 """
 
+import orjson
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool, StaticPool
 
 from app.core.config import settings
 
-# Create database engine
+
+def _async_database_url(url: str) -> str:
+    """Map a sync DATABASE_URL onto the matching async driver"""
+    if url.startswith("postgresql://"):
+        return url.replace("postgresql://", "postgresql+asyncpg://", 1)
+    if url.startswith("sqlite://"):
+        return url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    return url
+
+
+def _json_serializer(value) -> str:
+    """Encode JSON/JSONB column values with orjson"""
+    return orjson.dumps(value).decode()
+
+
+def _async_pool_options() -> dict:
+    """Connection pool settings for the async engine"""
+    if settings.DB_USE_NULL_POOL:
+        # An external pooler (PgBouncer) owns the connections. In transaction
+        # mode consecutive statements may run on different server
+        # connections, so asyncpg and SQLAlchemy must not cache prepared
+        # statements
+        options = {"poolclass": NullPool}
+        if settings.DATABASE_URL.startswith("postgresql"):
+            options["connect_args"] = {
+                "statement_cache_size": 0,
+                "prepared_statement_cache_size": 0,
+            }
+        return options
+    if settings.DATABASE_URL.startswith("sqlite"):
+        return {}
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_pre_ping": True,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+    }
+
+
+# Sync engine, only used for schema creation and CLI tooling (Alembic)
 engine = create_engine(
     settings.DATABASE_URL,
     poolclass=StaticPool,
     connect_args={"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {},
     echo=settings.DEBUG,
+    json_serializer=_json_serializer,
+    json_deserializer=orjson.loads,
+)
+
+# Async engine used by the API request path
+async_engine = create_async_engine(
+    _async_database_url(settings.DATABASE_URL),
+    echo=settings.DEBUG,
+    json_serializer=_json_serializer,
+    json_deserializer=orjson.loads,
+    query_cache_size=settings.DB_QUERY_CACHE_SIZE,
+    **_async_pool_options(),
 )
 
 # Create session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
 
 # Create base class for models
 Base = declarative_base()
 
 
-def get_db():
+async def get_db():
     """Dependency to get database session"""
-    db = SessionLocal()
-    try:
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 
 def init_db():
@@ -0,0 +1,57 @@
+"""
+Logging configuration for the application
+"""
+
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Optional
+
+from app.core.config import settings
+
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional[QueueHandler] = None
+
+
+def setup_logging() -> None:
+    """Route application logs through a queue drained by a background thread
+
+    Loggers under ``app`` only put records on an in-memory queue; the
+    QueueListener thread formats them and does the file or stream I/O, so
+    logging never blocks the event loop.
+    """
+    global _listener, _queue_handler
+    if _listener is not None:
+        return
+
+    if settings.LOG_FILE:
+        handler: logging.Handler = RotatingFileHandler(
+            settings.LOG_FILE,
+            maxBytes=settings.LOG_FILE_MAX_BYTES,
+            backupCount=settings.LOG_FILE_BACKUP_COUNT,
+        )
+    else:
+        handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    log_queue: queue.Queue = queue.Queue(-1)
+    logger = logging.getLogger("app")
+    logger.setLevel(settings.LOG_LEVEL)
+    _queue_handler = QueueHandler(log_queue)
+    logger.addHandler(_queue_handler)
+    logger.propagate = False
+
+    _listener = QueueListener(log_queue, handler, respect_handler_level=True)
+    _listener.start()
+
+
+def shutdown_logging() -> None:
+    """Detach the queue, then flush queued records and stop the listener thread"""
+    global _listener, _queue_handler
+    if _listener is not None:
+        logging.getLogger("app").removeHandler(_queue_handler)
+        _listener.stop()
+        _listener = None
+        _queue_handler = None
@@ -0,0 +1,15 @@
+"""
+Redis client shared by the application caches
+"""
+
+from redis.asyncio import Redis
+
+from app.core.config import settings
+
+# Connections are opened lazily on first command. Short timeouts keep a slow
+# or missing Redis from stalling requests; callers fall back to the database.
+redis_client = Redis.from_url(
+    settings.REDIS_URL,
+    socket_connect_timeout=0.5,
+    socket_timeout=0.5,
+)
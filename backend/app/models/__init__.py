@@ -2,7 +2,7 @@
 Models package initialization
 """
 
-from app.models.base import Base, TimestampMixin, SoftDeleteMixin
+from app.models.base import Base, TimestampMixin, SoftDeleteMixin, live_rows_index
 from app.models.user import User
 from app.models.project import Project, ProjectMember, ProjectVersion
 from app.models.media import MediaFile, TimelineClip, ChatMessage, MediaType
@@ -11,6 +11,7 @@ __all__ = [
     "Base",
     "TimestampMixin", 
     "SoftDeleteMixin",
+    "live_rows_index",
     "User",
     "Project",
     "ProjectMember",
@@ -3,11 +3,15 @@ Base models and common fields
 """
 
 from datetime import datetime
-from sqlalchemy import Column, Integer, DateTime, String
+from sqlalchemy import Boolean, Column, Integer, DateTime, JSON, Index, false, text
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.ext.declarative import declarative_base
 
 Base = declarative_base()
 
+# JSON document column: binary JSONB on PostgreSQL, plain JSON elsewhere
+JSONDocument = JSON().with_variant(JSONB(), "postgresql")
+
 
 class TimestampMixin:
     """Mixin to add timestamp fields to models"""
@@ -16,6 +20,19 @@ class TimestampMixin:
 
 
 class SoftDeleteMixin:
-    """Mixin to add soft delete functionality"""
+    """Mixin to add soft delete functionality
+
+    Models using it should add ``live_rows_index`` to their __table_args__.
+    """
     deleted_at = Column(DateTime, nullable=True)
-    is_deleted = Column(String(1), default='N', nullable=False)  # Y/N flag
+    is_deleted = Column(Boolean, default=False, server_default=false(), nullable=False)
+
+
+def live_rows_index(table_name: str) -> Index:
+    """Partial index over the rows of a soft-delete table that are not deleted"""
+    return Index(
+        f"ix_{table_name}_live",
+        "id",
+        postgresql_where=text("NOT is_deleted"),
+        sqlite_where=text("NOT is_deleted"),
+    )
@@ -2,21 +2,26 @@
 Media and timeline models for video editing
 """
 
-from sqlalchemy import Column, Integer, String, Text, Float, ForeignKey, JSON, Enum
+from sqlalchemy import Column, Integer, SmallInteger, String, Text, Float, ForeignKey, Index
 from sqlalchemy.orm import relationship
 import enum
 
-from app.models.base import Base, TimestampMixin
+from app.models.base import Base, TimestampMixin, JSONDocument
 
 
-class MediaType(str, enum.Enum):
-    VIDEO = "video"
-    AUDIO = "audio"
-    IMAGE = "image"
+class MediaType(enum.IntEnum):
+    """Stored as a SmallInteger; the API exposes the lowercase name"""
+    VIDEO = 1
+    AUDIO = 2
+    IMAGE = 3
 
 
 class MediaFile(Base, TimestampMixin):
     __tablename__ = "media_files"
+    __table_args__ = (
+        # A project's media library and the project filter on deletes
+        Index("ix_media_files_project", "project_id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     project_id = Column(Integer, ForeignKey("projects.id"), nullable=False)
@@ -24,23 +29,32 @@ class MediaFile(Base, TimestampMixin):
     original_filename = Column(String(255), nullable=False)
     file_path = Column(String(500), nullable=False)  # S3/MinIO path
     file_size = Column(Integer, nullable=False)  # Size in bytes
-    media_type = Column(Enum(MediaType), nullable=False)
+    media_type = Column(SmallInteger, nullable=False)  # MediaType value
     duration = Column(Float, nullable=True)  # Duration in seconds (for video/audio)
     width = Column(Integer, nullable=True)  # Width in pixels (for video/image)
     height = Column(Integer, nullable=True)  # Height in pixels (for video/image)
     fps = Column(Float, nullable=True)  # Frames per second (for video)
-    metadata = Column(JSON, nullable=True)  # Additional metadata
+    # Additional metadata; "metadata" itself is reserved by the declarative base
+    extra_metadata = Column("metadata", JSONDocument, nullable=True)
     
     # Relationships
     project = relationship("Project", back_populates="media_files")
     timeline_clips = relationship("TimelineClip", back_populates="media_file")
     
+    @property
+    def media_type_name(self) -> str:
+        return MediaType(self.media_type).name.lower()
+    
     def __repr__(self):
-        return f"<MediaFile(id={self.id}, filename='{self.filename}', type='{self.media_type}')>"
+        return f"<MediaFile(id={self.id}, filename='{self.filename}', type='{self.media_type_name}')>"
 
 
 class TimelineClip(Base, TimestampMixin):
     __tablename__ = "timeline_clips"
+    __table_args__ = (
+        # A project's timeline, in the order it is returned
+        Index("ix_timeline_clips_project_track_start", "project_id", "track_number", "start_time"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     project_id = Column(Integer, ForeignKey("projects.id"), nullable=False)
@@ -51,8 +65,8 @@ class TimelineClip(Base, TimestampMixin):
     media_start = Column(Float, nullable=True)  # Start time in source media (seconds)
     media_end = Column(Float, nullable=True)  # End time in source media (seconds)
     track_number = Column(Integer, nullable=False)  # Track number (0 = video, 1+ = audio)
-    properties = Column(JSON, nullable=True)  # Clip properties (effects, filters, etc.)
-    position = Column(JSON, nullable=True)  # Position and transform data
+    properties = Column(JSONDocument, nullable=True)  # Clip properties (effects, filters, etc.)
+    position = Column(JSONDocument, nullable=True)  # Position and transform data
     
     # Relationships
     project = relationship("Project", back_populates="timeline_clips")
@@ -64,6 +78,11 @@ class TimelineClip(Base, TimestampMixin):
 
 class ChatMessage(Base, TimestampMixin):
     __tablename__ = "chat_messages"
+    __table_args__ = (
+        # Keyset pagination of a project's history, newest first; id breaks
+        # ties between messages sharing a timestamp
+        Index("ix_chat_messages_project_created", "project_id", "created_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     project_id = Column(Integer, ForeignKey("projects.id"), nullable=False)
@@ -2,10 +2,10 @@
 Project model for video editing projects
 """
 
-from sqlalchemy import Column, Integer, String, Text, Boolean, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Text, Boolean, ForeignKey, Index
 from sqlalchemy.orm import relationship
 
-from app.models.base import Base, TimestampMixin
+from app.models.base import Base, TimestampMixin, JSONDocument
 
 
 class Project(Base, TimestampMixin):
@@ -16,7 +16,7 @@ class Project(Base, TimestampMixin):
     description = Column(Text, nullable=True)
     owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     is_public = Column(Boolean, default=False, nullable=False)
-    settings = Column(JSON, nullable=True)  # Project settings like resolution, fps, etc.
+    settings = Column(JSONDocument, nullable=True)  # Project settings like resolution, fps, etc.
     
     # Relationships
     owner = relationship("User", back_populates="projects")
@@ -31,12 +31,22 @@ class Project(Base, TimestampMixin):
 
 class ProjectMember(Base, TimestampMixin):
     __tablename__ = "project_members"
+    __table_args__ = (
+        # Permission checks look up (project, user); role is carried in the
+        # index so Postgres can answer them with an index-only scan
+        Index(
+            "ix_project_members_project_user", "project_id", "user_id",
+            unique=True, postgresql_include=["role"],
+        ),
+        # "Projects of a user" for listings and authorization subqueries
+        Index("ix_project_members_user_project", "user_id", "project_id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     project_id = Column(Integer, ForeignKey("projects.id"), nullable=False)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     role = Column(String(20), nullable=False, default="viewer")  # owner, editor, viewer
-    permissions = Column(JSON, nullable=True)  # Specific permissions
+    permissions = Column(JSONDocument, nullable=True)  # Specific permissions
     
     # Relationships
     project = relationship("Project", back_populates="members")
@@ -54,7 +64,7 @@ class ProjectVersion(Base, TimestampMixin):
     version_number = Column(Integer, nullable=False)
     name = Column(String(100), nullable=True)
     description = Column(Text, nullable=True)
-    snapshot_data = Column(JSON, nullable=False)  # Complete project state snapshot
+    snapshot_data = Column(JSONDocument, nullable=False)  # Complete project state snapshot
     
     # Relationships
     project = relationship("Project", back_populates="versions")
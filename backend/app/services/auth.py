@@ -2,14 +2,19 @@
 Authentication service for user management and JWT tokens
 """
 
+import hashlib
+import time
 from datetime import datetime, timedelta
 from typing import Optional
+import msgspec
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
 from app.models.user import User
+from app.services.cache import cache_delete, cache_get, cache_set
 
 
 # Password hashing context
@@ -39,6 +44,21 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return encoded_jwt
 
 
+class UserClaims(msgspec.Struct):
+    """Identity resolved from a validated access token"""
+    user_id: int
+    username: str
+    exp: int
+
+
+_claims_encoder = msgspec.msgpack.Encoder()
+_claims_decoder = msgspec.msgpack.Decoder(UserClaims)
+
+
+def _token_cache_key(token: str) -> str:
+    return "jwt:" + hashlib.sha256(token.encode()).hexdigest()
+
+
 def verify_token(token: str) -> Optional[dict]:
     """Verify and decode a JWT token"""
     try:
@@ -48,9 +68,9 @@ def verify_token(token: str) -> Optional[dict]:
         return None
 
 
-def authenticate_user(db: Session, username: str, password: str) -> Optional[User]:
+async def authenticate_user(db: AsyncSession, username: str, password: str) -> Optional[User]:
     """Authenticate a user with username and password"""
-    user = db.query(User).filter(User.username == username).first()
+    user = await get_user_by_username(db, username)
     if not user:
         return None
     if not verify_password(password, user.hashed_password):
@@ -58,17 +78,19 @@ def authenticate_user(db: Session, username: str, password: str) -> Optional[Use
     return user
 
 
-def get_user_by_username(db: Session, username: str) -> Optional[User]:
+async def get_user_by_username(db: AsyncSession, username: str) -> Optional[User]:
     """Get a user by username"""
-    return db.query(User).filter(User.username == username).first()
+    result = await db.execute(select(User).where(User.username == username))
+    return result.scalar_one_or_none()
 
 
-def get_user_by_email(db: Session, email: str) -> Optional[User]:
+async def get_user_by_email(db: AsyncSession, email: str) -> Optional[User]:
     """Get a user by email"""
-    return db.query(User).filter(User.email == email).first()
+    result = await db.execute(select(User).where(User.email == email))
+    return result.scalar_one_or_none()
 
 
-def create_user(db: Session, username: str, email: str, password: str, full_name: str = None) -> User:
+async def create_user(db: AsyncSession, username: str, email: str, password: str, full_name: str = None) -> User:
     """Create a new user"""
     hashed_password = get_password_hash(password)
     db_user = User(
@@ -78,6 +100,43 @@ def create_user(db: Session, username: str, email: str, password: str, full_name
         full_name=full_name
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     return db_user
+
+
+async def get_user_claims(db: AsyncSession, token: str) -> Optional[UserClaims]:
+    """Resolve an access token to the user it was issued for
+
+    Results are cached in Redis under a hash of the token until the token
+    expires (capped at the configured token lifetime), so reconnecting
+    clients skip JWT decoding and the user lookup.
+    """
+    key = _token_cache_key(token)
+    cached = await cache_get(key)
+    if cached is not None:
+        return _claims_decoder.decode(cached)
+    
+    payload = verify_token(token)
+    if not payload:
+        return None
+    
+    username = payload.get("sub")
+    exp = payload.get("exp")
+    if not username or exp is None:
+        return None
+    
+    user = await get_user_by_username(db, username)
+    if not user:
+        return None
+    
+    claims = UserClaims(user_id=user.id, username=user.username, exp=int(exp))
+    ttl = min(claims.exp - int(time.time()), settings.JWT_ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+    if ttl > 0:
+        await cache_set(key, _claims_encoder.encode(claims), ttl)
+    return claims
+
+
+async def invalidate_token(token: str) -> None:
+    """Drop the cached claims of a token, e.g. when its user is disabled"""
+    await cache_delete(_token_cache_key(token))
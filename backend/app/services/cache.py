@@ -0,0 +1,63 @@
+"""
+Redis cache access shared by the services
+"""
+
+from typing import Optional, Union
+
+from redis.exceptions import RedisError
+
+from app.core.redis import redis_client
+
+# The caches are only an optimization: if Redis fails, reads miss and
+# writes are skipped, so callers fall back to the database.
+
+
+async def cache_get(key: str) -> Optional[bytes]:
+    """Return the cached value of a key, or None on a miss"""
+    try:
+        return await redis_client.get(key)
+    except RedisError:
+        return None
+
+
+async def cache_set(key: str, value: Union[str, bytes], ttl: int) -> None:
+    """Cache a value for ttl seconds"""
+    try:
+        await redis_client.set(key, value, ex=ttl)
+    except RedisError:
+        pass
+
+
+async def cache_delete(*keys: str) -> None:
+    """Drop cached keys"""
+    try:
+        await redis_client.delete(*keys)
+    except RedisError:
+        pass
+
+
+async def cache_hget(key: str, field: str) -> Optional[bytes]:
+    """Return the cached value of a hash field, or None on a miss"""
+    try:
+        return await redis_client.hget(key, field)
+    except RedisError:
+        return None
+
+
+async def cache_hset(key: str, field: str, value: Union[str, bytes], ttl: int) -> None:
+    """Cache a hash field; the hash expires ttl seconds after its first field"""
+    try:
+        async with redis_client.pipeline(transaction=True) as pipe:
+            pipe.hset(key, field, value)
+            pipe.expire(key, ttl, nx=True)
+            await pipe.execute()
+    except RedisError:
+        pass
+
+
+async def cache_hdel(key: str, field: str) -> None:
+    """Drop a cached hash field"""
+    try:
+        await redis_client.hdel(key, field)
+    except RedisError:
+        pass
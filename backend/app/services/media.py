@@ -2,8 +2,11 @@
 Media service for S3/MinIO file operations
 """
 
+import asyncio
+import logging
 import os
 import uuid
+from functools import lru_cache
 from typing import Optional, List
 from datetime import timedelta
 import boto3
@@ -12,6 +15,17 @@ from botocore.exceptions import ClientError
 
 from app.core.config import settings
 from app.models.media import MediaFile, MediaType
+from app.services.cache import cache_get, cache_set
+
+logger = logging.getLogger(__name__)
+
+
+# Presigned URLs are reused until this many seconds before they expire
+DOWNLOAD_URL_MARGIN = 60
+
+
+def _download_url_key(file_key: str, expires_in: int) -> str:
+    return f"dl:{file_key}:{expires_in}"
 
 
 class MediaService:
@@ -26,7 +40,8 @@ class MediaService:
                 settings.MINIO_ENDPOINT,
                 access_key=settings.MINIO_ROOT_USER,
                 secret_key=settings.MINIO_ROOT_PASSWORD,
-                secure=settings.MINIO_SECURE
+                secure=settings.MINIO_SECURE,
+                region=settings.MINIO_REGION
             )
             self.bucket_name = "video-editor-media"
         else:
@@ -50,9 +65,43 @@ class MediaService:
             else:
                 self.client.head_bucket(Bucket=self.bucket_name)
         except Exception as e:
-            print(f"Warning: Could not ensure bucket exists: {e}")
+            logger.warning("Could not ensure bucket exists: %s", e)
+    
+    async def generate_presigned_upload_url(self, filename: str, content_type: str, project_id: int) -> dict:
+        """Generate a presigned URL for file upload without blocking the event loop"""
+        return await asyncio.to_thread(
+            self._generate_presigned_upload_url, filename, content_type, project_id
+        )
+    
+    async def get_file_url(self, file_key: str, expires_in: int = 3600) -> str:
+        """Get a presigned URL for file download without blocking the event loop
+
+        File keys are never reused, so a signed URL stays valid for its
+        object and is cached in Redis until shortly before it expires.
+        """
+        cache_key = _download_url_key(file_key, expires_in)
+        cached = await cache_get(cache_key)
+        if cached is not None:
+            return cached.decode()
+        
+        url = await asyncio.to_thread(self._get_file_url, file_key, expires_in)
+        
+        if expires_in > DOWNLOAD_URL_MARGIN:
+            await cache_set(cache_key, url, expires_in - DOWNLOAD_URL_MARGIN)
+        return url
+    
+    async def delete_file(self, file_key: str) -> bool:
+        """Delete a file from storage without blocking the event loop"""
+        return await asyncio.to_thread(self._delete_file, file_key)
     
-    def generate_presigned_upload_url(self, filename: str, content_type: str, project_id: int) -> dict:
+    async def get_file_info(self, file_key: str) -> Optional[dict]:
+        """Get file information from storage without blocking the event loop"""
+        return await asyncio.to_thread(self._get_file_info, file_key)
+    
+    # The storage clients are synchronous: signing is CPU work and MinIO may
+    # look up the bucket region over HTTP, so these run in worker threads
+    
+    def _generate_presigned_upload_url(self, filename: str, content_type: str, project_id: int) -> dict:
         """Generate a presigned URL for file upload"""
         file_key = f"projects/{project_id}/{uuid.uuid4()}_{filename}"
         
@@ -84,7 +133,7 @@ class MediaService:
         except Exception as e:
             raise Exception(f"Failed to generate presigned URL: {e}")
     
-    def get_file_url(self, file_key: str, expires_in: int = 3600) -> str:
+    def _get_file_url(self, file_key: str, expires_in: int = 3600) -> str:
         """Get a presigned URL for file download"""
         try:
             if self.use_minio:
@@ -105,7 +154,7 @@ class MediaService:
         except Exception as e:
             raise Exception(f"Failed to generate download URL: {e}")
     
-    def delete_file(self, file_key: str) -> bool:
+    def _delete_file(self, file_key: str) -> bool:
         """Delete a file from storage"""
         try:
             if self.use_minio:
@@ -114,10 +163,10 @@ class MediaService:
                 self.client.delete_object(Bucket=self.bucket_name, Key=file_key)
             return True
         except Exception as e:
-            print(f"Failed to delete file {file_key}: {e}")
+            logger.warning("Failed to delete file %s: %s", file_key, e)
             return False
     
-    def get_file_info(self, file_key: str) -> Optional[dict]:
+    def _get_file_info(self, file_key: str) -> Optional[dict]:
         """Get file information from storage"""
         try:
             if self.use_minio:
@@ -135,9 +184,15 @@ class MediaService:
                     "etag": response['ETag']
                 }
         except Exception as e:
-            print(f"Failed to get file info for {file_key}: {e}")
+            logger.warning("Failed to get file info for %s: %s", file_key, e)
             return None
 
 
-# Global media service instance
-media_service = MediaService()
+@lru_cache(maxsize=1)
+def get_media_service() -> MediaService:
+    """Shared media service, built on first use
+
+    Construction checks the storage bucket over the network, so it is kept
+    out of module import. As a sync dependency it runs in the threadpool.
+    """
+    return MediaService()
@@ -0,0 +1,91 @@
+"""
+Project membership checks shared by the API endpoints
+"""
+
+from typing import Any, Iterable, Optional
+
+from sqlalchemy import Select, bindparam, select
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.services.cache import cache_delete, cache_hdel, cache_hget, cache_hset
+from app.models.project import Project, ProjectMember
+
+# Seconds a cached project role stays valid
+MEMBER_ROLE_TTL = 60
+
+# Built once at import; handlers only pass parameters
+_MEMBER_ROLE_STMT = select(ProjectMember.role).where(
+    ProjectMember.project_id == bindparam("pid"),
+    ProjectMember.user_id == bindparam("uid")
+)
+
+
+async def fetch_with_membership(
+    db: AsyncSession, model: Any, obj_id: int, user_id: int, *options: Any
+) -> Optional[Row]:
+    """Fetch an entity together with the user's membership of its project
+
+    The entity and the ProjectMember row are read with a single JOIN, so the
+    lookup and the authorization check cost one round trip. Returns an
+    ``(entity, member)`` row, or None when the entity does not exist or the
+    user is not a member of its project.
+    """
+    project_id = model.id if model is Project else model.project_id
+    stmt = (
+        select(model, ProjectMember)
+        .join(ProjectMember, ProjectMember.project_id == project_id)
+        .where(model.id == obj_id, ProjectMember.user_id == user_id)
+    )
+    if options:
+        stmt = stmt.options(*options)
+
+    result = await db.execute(stmt)
+    return result.first()
+
+
+def member_project_ids(user_id: int, roles: Optional[Iterable[str]] = None) -> Select:
+    """Subquery of the project ids a user belongs to, optionally limited to roles
+
+    Used to fold authorization into the WHERE clause of a write statement.
+    """
+    stmt = select(ProjectMember.project_id).where(ProjectMember.user_id == user_id)
+    if roles is not None:
+        stmt = stmt.where(ProjectMember.role.in_(roles))
+    return stmt
+
+
+def _project_roles_key(project_id: int) -> str:
+    return f"perm:{project_id}"
+
+
+async def get_member_role(db: AsyncSession, user_id: int, project_id: int) -> Optional[str]:
+    """Return the user's role in a project, or None if they are not a member
+
+    Roles (and non-membership) are cached in a Redis hash per project,
+    keyed by user, for at most MEMBER_ROLE_TTL seconds, so the permission
+    gate on hot endpoints usually skips the database. If Redis is
+    unavailable the role is read from the database.
+    """
+    key = _project_roles_key(project_id)
+    cached = await cache_hget(key, str(user_id))
+    if cached is not None:
+        return cached.decode() or None
+
+    result = await db.execute(
+        _MEMBER_ROLE_STMT, {"pid": project_id, "uid": user_id}
+    )
+    role = result.scalar_one_or_none()
+
+    await cache_hset(key, str(user_id), role or "", MEMBER_ROLE_TTL)
+    return role
+
+
+async def invalidate_member_role(user_id: int, project_id: int) -> None:
+    """Drop the cached role of one project member"""
+    await cache_hdel(_project_roles_key(project_id), str(user_id))
+
+
+async def invalidate_project_roles(project_id: int) -> None:
+    """Drop every cached role for a project"""
+    await cache_delete(_project_roles_key(project_id))
@@ -0,0 +1,33 @@
+"""
+Partial updates of loaded entities
+"""
+
+from typing import Any, Dict
+
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
+
+
+async def apply_update(db: AsyncSession, entity: Any, values: Dict[str, Any]) -> None:
+    """Write changed fields of a loaded entity and commit
+
+    Only the given columns are updated. RETURNING hands back the new
+    updated_at, which is set on the entity with the changed fields, so it
+    is not read back after the commit.
+    """
+    if not values:
+        return
+    
+    model = type(entity)
+    result = await db.execute(
+        update(model)
+        .where(model.id == entity.id)
+        .values(**values)
+        .returning(model.updated_at)
+        .execution_options(synchronize_session=False)
+    )
+    values = {**values, "updated_at": result.scalar_one()}
+    await db.commit()
+    for key, value in values.items():
+        set_committed_value(entity, key, value)
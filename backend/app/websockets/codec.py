@@ -0,0 +1,128 @@
+"""
+Wire codecs for WebSocket frames
+"""
+
+import zlib
+from typing import Any, List, Union
+
+import msgspec
+from fastapi import WebSocket, WebSocketDisconnect
+
+from app.api.schemas import ClientMessage
+
+# Subprotocols a client requests to receive MessagePack binary frames,
+# optionally deflated by the application
+MSGPACK_SUBPROTOCOL = "msgpack"
+MSGPACK_DEFLATE_SUBPROTOCOL = "msgpack-deflate"
+
+# Fast compression; broadcast payloads are small and latency-sensitive
+DEFLATE_LEVEL = 1
+
+Frame = Union[str, bytes]
+
+
+def _msgpack_array_header(length: int) -> bytes:
+    if length < 16:
+        return bytes((0x90 | length,))
+    if length < 0x10000:
+        return b"\xdc" + length.to_bytes(2, "big")
+    return b"\xdd" + length.to_bytes(4, "big")
+
+
+class Codec:
+    """Encodes and decodes WebSocket frames in one wire format
+
+    Encoders and decoders are built once and shared by every connection
+    using the format. With ``compress`` set, frames are deflated by the
+    application, once per encoded frame, instead of by per-connection
+    permessage-deflate contexts.
+    """
+
+    def __init__(
+        self,
+        subprotocol: Union[str, None],
+        encoder: Any,
+        decoder: Any,
+        binary: bool,
+        compress: bool = False,
+    ):
+        self.subprotocol = subprotocol
+        self.binary = binary
+        self.compress = compress
+        self._encoder = encoder
+        self._decoder = decoder
+
+    def encode(self, message: Any) -> Frame:
+        """Encode a message into a frame payload"""
+        data = self._encoder.encode(message)
+        if self.compress:
+            return zlib.compress(data, DEFLATE_LEVEL)
+        return data if self.binary else data.decode()
+
+    def decode(self, frame: Frame) -> ClientMessage:
+        """Decode a frame payload into a client message struct
+
+        Raises msgspec.ValidationError for an unknown or ill-formed message
+        and msgspec.DecodeError for a payload that cannot be decoded at all.
+        """
+        if self.binary and isinstance(frame, str):
+            frame = frame.encode()
+        if self.compress:
+            try:
+                frame = zlib.decompress(frame)
+            except zlib.error as e:
+                raise msgspec.DecodeError(str(e)) from e
+        return self._decoder.decode(frame)
+
+    def join(self, frames: List[Frame]) -> Frame:
+        """Combine encoded frames into one frame holding an array of their messages"""
+        if not self.binary:
+            return "[" + ",".join(frames) + "]"
+        if self.compress:
+            frames = [zlib.decompress(frame) for frame in frames]
+        data = _msgpack_array_header(len(frames)) + b"".join(frames)
+        return zlib.compress(data, DEFLATE_LEVEL) if self.compress else data
+
+    async def send(self, websocket: WebSocket, frame: Frame):
+        """Send an encoded frame as a text or binary message"""
+        if self.binary:
+            await websocket.send_bytes(frame)
+        else:
+            await websocket.send_text(frame)
+
+
+JSON_CODEC = Codec(None, msgspec.json.Encoder(), msgspec.json.Decoder(ClientMessage), binary=False)
+MSGPACK_CODEC = Codec(
+    MSGPACK_SUBPROTOCOL, msgspec.msgpack.Encoder(), msgspec.msgpack.Decoder(ClientMessage), binary=True
+)
+MSGPACK_DEFLATE_CODEC = Codec(
+    MSGPACK_DEFLATE_SUBPROTOCOL,
+    msgspec.msgpack.Encoder(),
+    msgspec.msgpack.Decoder(ClientMessage),
+    binary=True,
+    compress=True,
+)
+
+# Server preference when a client offers several subprotocols
+_CODECS_BY_PREFERENCE = (MSGPACK_DEFLATE_CODEC, MSGPACK_CODEC)
+
+
+def negotiate_codec(websocket: WebSocket) -> Codec:
+    """Pick the codec from the subprotocols offered in the handshake
+
+    Clients that do not ask for MessagePack keep getting JSON text frames.
+    """
+    offered = websocket.scope.get("subprotocols", ())
+    for codec in _CODECS_BY_PREFERENCE:
+        if codec.subprotocol in offered:
+            return codec
+    return JSON_CODEC
+
+
+async def receive_frame(websocket: WebSocket) -> Frame:
+    """Receive the next text or binary frame payload"""
+    message = await websocket.receive()
+    if message["type"] == "websocket.disconnect":
+        raise WebSocketDisconnect(message.get("code", 1000))
+    data = message.get("bytes")
+    return data if data is not None else message.get("text", "")
@@ -2,15 +2,33 @@
 WebSocket manager for real-time collaboration
 """
 
-import json
 import asyncio
-from typing import Dict, List, Set, Optional
+import logging
+from typing import Dict, Set, Optional
 from fastapi import WebSocket, WebSocketDisconnect
-from sqlalchemy.orm import Session
 
-from app.core.database import get_db
-from app.models.user import User
-from app.models.project import Project
+from app.api.schemas import (
+    ChatMessageWebSocket, CursorPosition, CursorUpdateMessage, TimelineUpdateMessage
+)
+from app.websockets.codec import Codec, Frame
+
+logger = logging.getLogger(__name__)
+
+# Seconds a single client may take to accept a frame
+SEND_TIMEOUT = 5.0
+# Queued frames merged into one WebSocket message by a client's writer
+MAX_BATCH_FRAMES = 64
+# Frames queued for a client beyond which it is disconnected
+QUEUE_MAX_FRAMES = 256
+# Close code telling a dropped client to reconnect ("try again later")
+CLOSE_TRY_AGAIN_LATER = 1013
+# Seconds between cursor broadcasts (30 Hz)
+CURSOR_FLUSH_INTERVAL = 1 / 30
+# Cursor colors, assigned to users by id
+USER_COLORS = (
+    "#FF6B6B", "#4ECDC4", "#45B7D1", "#96CEB4", "#FFEAA7",
+    "#DDA0DD", "#98D8C8", "#F7DC6F", "#BB8FCE", "#85C1E9"
+)
 
 
 class ConnectionManager:
@@ -18,25 +36,39 @@ class ConnectionManager:
     
     def __init__(self):
         # Store active connections by project_id
-        self.active_connections: Dict[int, List[WebSocket]] = {}
+        self.active_connections: Dict[int, Set[WebSocket]] = {}
         # Store user info for each connection
         self.connection_users: Dict[WebSocket, dict] = {}
         # Store cursor positions for each user
         self.user_cursors: Dict[int, Dict[int, dict]] = {}  # project_id -> user_id -> cursor_data
+        # Users whose cursor moved since the last flush
+        self._dirty_cursors: Dict[int, Set[int]] = {}  # project_id -> user_ids
+        self._cursor_flusher: Optional[asyncio.Task] = None
+        # Pending closes of dropped clients, kept so they are not collected
+        self._closing: Set[asyncio.Task] = set()
     
-    async def connect(self, websocket: WebSocket, project_id: int, user: dict):
-        """Connect a user to a project room"""
-        await websocket.accept()
-        
+    async def connect(self, websocket: WebSocket, project_id: int, user: dict, codec: Codec):
+        """Connect a user to a project room
+
+        The websocket must already be accepted with the subprotocol of
+        ``codec``, which is used for every frame sent to it. Outgoing
+        frames are queued and written by a dedicated task per connection.
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=QUEUE_MAX_FRAMES)
         if project_id not in self.active_connections:
-            self.active_connections[project_id] = []
+            self.active_connections[project_id] = set()
             self.user_cursors[project_id] = {}
         
-        self.active_connections[project_id].append(websocket)
+        self.active_connections[project_id].add(websocket)
         self.connection_users[websocket] = {
             "user_id": user["id"],
             "username": user["username"],
-            "project_id": project_id
+            "project_id": project_id,
+            "codec": codec,
+            "queue": queue,
+            # Users whose cursor moved while this client was behind
+            "stale_cursors": set(),
+            "writer": asyncio.create_task(self._write_frames(websocket, codec, queue))
         }
         
         # Initialize user cursor
@@ -86,7 +118,7 @@ class ConnectionManager:
             
             # Remove from active connections
             if project_id in self.active_connections:
-                self.active_connections[project_id].remove(websocket)
+                self.active_connections[project_id].discard(websocket)
                 if not self.active_connections[project_id]:
                     del self.active_connections[project_id]
                     del self.user_cursors[project_id]
@@ -95,66 +127,184 @@ class ConnectionManager:
             if project_id in self.user_cursors and user_id in self.user_cursors[project_id]:
                 del self.user_cursors[project_id][user_id]
             
-            # Remove from connection users
+            # Stop the writer and remove from connection users
+            user_info["writer"].cancel()
             del self.connection_users[websocket]
     
     async def send_personal_message(self, websocket: WebSocket, message: dict):
         """Send a message to a specific user"""
-        try:
-            await websocket.send_text(json.dumps(message))
-        except Exception as e:
-            print(f"Error sending personal message: {e}")
+        user_info = self.connection_users.get(websocket)
+        if user_info is None:
+            return
+        self._enqueue(websocket, user_info, user_info["codec"].encode(message))
     
     async def broadcast_to_project(self, project_id: int, message: dict, exclude_websocket: WebSocket = None):
         """Broadcast a message to all users in a project"""
         if project_id not in self.active_connections:
             return
         
-        disconnected_websockets = []
-        
-        for websocket in self.active_connections[project_id]:
-            if websocket == exclude_websocket:
+        # Encode the message once per wire format in use, not per recipient,
+        # and hand the frame to each client's writer without waiting on it
+        frames: Dict[Codec, Frame] = {}
+        for websocket in tuple(self.active_connections[project_id]):
+            if websocket is exclude_websocket:
                 continue
             
+            user_info = self.connection_users[websocket]
+            codec = user_info["codec"]
+            frame = frames.get(codec)
+            if frame is None:
+                frame = frames[codec] = codec.encode(message)
+            self._enqueue(websocket, user_info, frame)
+    
+    def _enqueue(self, websocket: WebSocket, user_info: dict, frame: Frame):
+        """Queue a frame for a client, dropping the client if it is too far behind"""
+        try:
+            user_info["queue"].put_nowait(frame)
+        except asyncio.QueueFull:
+            logger.warning("Dropping WebSocket client %s frames behind", QUEUE_MAX_FRAMES)
+            self._drop(websocket)
+    
+    def _drop(self, websocket: WebSocket):
+        """Disconnect a client that missed frames and close its socket
+
+        Skipping frames would leave the client with a silently wrong view of
+        the project; once closed it reconnects and gets a fresh project_state.
+        """
+        self.disconnect(websocket)
+        task = asyncio.create_task(self._close(websocket))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+    
+    async def _close(self, websocket: WebSocket):
+        """Close a dropped client's socket, ignoring one that is already gone"""
+        try:
+            await asyncio.wait_for(
+                websocket.close(code=CLOSE_TRY_AGAIN_LATER), timeout=SEND_TIMEOUT
+            )
+        except Exception:
+            pass
+    
+    async def _write_frames(self, websocket: WebSocket, codec: Codec, queue: asyncio.Queue):
+        """Write queued frames to one client until it disconnects
+
+        Frames that pile up while a send is in flight are merged into a
+        single message holding an array of them.
+        """
+        while True:
+            frames = [await queue.get()]
+            while len(frames) < MAX_BATCH_FRAMES and not queue.empty():
+                frames.append(queue.get_nowait())
+            payload = frames[0] if len(frames) == 1 else codec.join(frames)
+            
             try:
-                await websocket.send_text(json.dumps(message))
+                await asyncio.wait_for(codec.send(websocket, payload), timeout=SEND_TIMEOUT)
+            except asyncio.CancelledError:
+                raise
             except Exception as e:
-                print(f"Error broadcasting message: {e}")
-                disconnected_websockets.append(websocket)
+                # Expected whenever a client drops or stalls; no traceback
+                logger.warning("Dropping WebSocket client after failed send: %r", e)
+                self._drop(websocket)
+                return
+            
+            if queue.empty():
+                self._enqueue_stale_cursors(websocket)
+    
+    def _enqueue_stale_cursors(self, websocket: WebSocket):
+        """Queue the latest positions of cursors a lagging client skipped"""
+        user_info = self.connection_users.get(websocket)
+        if user_info is None or not user_info["stale_cursors"]:
+            return
         
-        # Clean up disconnected websockets
-        for websocket in disconnected_websockets:
-            self.disconnect(websocket)
+        message = self._cursor_batch(user_info["project_id"], user_info["stale_cursors"])
+        user_info["stale_cursors"].clear()
+        if message is not None:
+            self._enqueue(websocket, user_info, user_info["codec"].encode(message))
     
-    async def handle_cursor_update(self, websocket: WebSocket, data: dict):
+    async def handle_cursor_update(self, websocket: WebSocket, data: CursorUpdateMessage):
         """Handle cursor position updates from users"""
-        if websocket not in self.connection_users:
+        user_info = self.connection_users.get(websocket)
+        if user_info is None:
             return
         
-        user_info = self.connection_users[websocket]
         project_id = user_info["project_id"]
         user_id = user_info["user_id"]
+        cursors = self.user_cursors.get(project_id)
+        cursor = cursors.get(user_id) if cursors else None
+        if cursor is None:
+            return
+        
+        # Update cursor position in place
+        cursor["x"] = data.x
+        cursor["y"] = data.y
+        cursor["timestamp"] = data.timestamp
         
-        # Update cursor position
-        if project_id in self.user_cursors and user_id in self.user_cursors[project_id]:
-            self.user_cursors[project_id][user_id].update({
-                "x": data.get("x", 0),
-                "y": data.get("y", 0),
-                "timestamp": data.get("timestamp")
-            })
+        # Only the latest position matters; the flusher broadcasts it
+        self._dirty_cursors.setdefault(project_id, set()).add(user_id)
+        if self._cursor_flusher is None or self._cursor_flusher.done():
+            self._cursor_flusher = asyncio.create_task(self._flush_cursors())
+    
+    async def _flush_cursors(self):
+        """Broadcast moved cursors at a fixed rate while any project has users
+
+        Each project gets one combined message per interval no matter how
+        many cursor updates arrived, so cursor traffic scales with the
+        number of users rather than the mouse event rate.
+        """
+        while self.active_connections:
+            await asyncio.sleep(CURSOR_FLUSH_INTERVAL)
+            dirty, self._dirty_cursors = self._dirty_cursors, {}
             
-            # Broadcast cursor update to other users
-            await self.broadcast_to_project(
-                project_id,
-                {
-                    "type": "cursor_update",
-                    "user_id": user_id,
-                    "cursor": self.user_cursors[project_id][user_id]
-                },
-                exclude_websocket=websocket
-            )
+            for project_id, user_ids in dirty.items():
+                self._broadcast_cursors(project_id, user_ids)
+    
+    def _cursor_batch(self, project_id: int, user_ids: Set[int]) -> Optional[dict]:
+        """Build a "cursors" message with the current positions of the given users"""
+        cursors = self.user_cursors.get(project_id)
+        if not cursors:
+            return None
+        
+        items = []
+        for user_id in user_ids:
+            cursor = cursors.get(user_id)
+            if cursor is not None:
+                items.append(
+                    CursorPosition(user_id, cursor["x"], cursor["y"], cursor.get("timestamp"))
+                )
+        return {"type": "cursors", "items": items} if items else None
+    
+    def _broadcast_cursors(self, project_id: int, user_ids: Set[int]):
+        """Queue a cursor batch for each client that is keeping up
+
+        Every client gets the same encoded batch, so a mover's own entry is
+        included and clients drop entries carrying their own user_id. A
+        client that was the only mover is sent nothing. Cursor positions are superseded by the next batch, so a client that
+        still has frames queued does not get this one. It only records who
+        moved, and their latest positions are sent once its queue drains.
+        """
+        message = self._cursor_batch(project_id, user_ids)
+        if message is None:
+            return
+        
+        frames: Dict[Codec, Frame] = {}
+        for websocket in tuple(self.active_connections.get(project_id, ())):
+            user_info = self.connection_users[websocket]
+            own_id = user_info["user_id"]
+            if not user_info["queue"].empty():
+                user_info["stale_cursors"].update(user_ids)
+                user_info["stale_cursors"].discard(own_id)
+                continue
+            
+            if len(user_ids) == 1 and own_id in user_ids:
+                continue
+            
+            codec = user_info["codec"]
+            frame = frames.get(codec)
+            if frame is None:
+                frame = frames[codec] = codec.encode(message)
+            self._enqueue(websocket, user_info, frame)
     
-    async def handle_timeline_update(self, websocket: WebSocket, data: dict):
+    async def handle_timeline_update(self, websocket: WebSocket, data: TimelineUpdateMessage):
         """Handle timeline updates from users"""
         if websocket not in self.connection_users:
             return
@@ -173,7 +323,7 @@ class ConnectionManager:
             exclude_websocket=websocket
         )
     
-    async def handle_chat_message(self, websocket: WebSocket, data: dict):
+    async def handle_chat_message(self, websocket: WebSocket, data: ChatMessageWebSocket):
         """Handle chat messages from users"""
         if websocket not in self.connection_users:
             return
@@ -188,18 +338,14 @@ class ConnectionManager:
                 "type": "chat_message",
                 "user_id": user_info["user_id"],
                 "username": user_info["username"],
-                "message": data.get("message", ""),
-                "timestamp": data.get("timestamp")
+                "message": data.message,
+                "timestamp": data.timestamp
             }
         )
     
     def _generate_user_color(self, user_id: int) -> str:
         """Generate a consistent color for a user"""
-        colors = [
-            "#FF6B6B", "#4ECDC4", "#45B7D1", "#96CEB4", "#FFEAA7",
-            "#DDA0DD", "#98D8C8", "#F7DC6F", "#BB8FCE", "#85C1E9"
-        ]
-        return colors[user_id % len(colors)]
+        return USER_COLORS[user_id % len(USER_COLORS)]
 
 
 # Global connection manager instance
@@ -2,17 +2,34 @@
 Main FastAPI application for Collaborative Video Editor
 """
 
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 
 from app.core.config import settings
 from app.api.api_v1.api import api_router
-from app.core.database import engine
+from app.core.database import async_engine
+from app.core.logging import setup_logging, shutdown_logging
 from app.models import base
 
-# Create database tables
-base.Base.metadata.create_all(bind=engine)
+
+async def create_tables():
+    """Create missing tables once the worker starts, not at import"""
+    if settings.AUTO_CREATE_SCHEMA:
+        async with async_engine.begin() as conn:
+            await conn.run_sync(base.Base.metadata.create_all)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    setup_logging()
+    await create_tables()
+    yield
+    shutdown_logging()
+
 
 app = FastAPI(
     title=settings.APP_NAME,
@@ -21,6 +38,8 @@ app = FastAPI(
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
     docs_url="/docs",
     redoc_url="/redoc",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
 )
 
 # Set up CORS
@@ -57,5 +76,9 @@ if __name__ == "__main__":
         host="0.0.0.0",
         port=8000,
         reload=True,
+        loop="uvloop",
+        http="httptools",
+        ws="websockets",
+        ws_per_message_deflate=False,
         log_level="info"
     )
@@ -0,0 +1,108 @@
+"""
+Shared fixtures for the test suite
+"""
+
+import itertools
+import os
+import tempfile
+
+import fakeredis
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+# Run against a throwaway SQLite database created at startup. Redis points
+# at a closed port, so every cache falls back to the database.
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/test.db"
+os.environ["REDIS_URL"] = "redis://127.0.0.1:1"
+os.environ["AUTO_CREATE_SCHEMA"] = "true"
+
+from main import app
+from app.core.database import async_engine
+from app.services import cache
+
+
+@event.listens_for(async_engine.sync_engine, "connect")
+def _enable_foreign_keys(dbapi_connection, connection_record):
+    """SQLite only enforces foreign keys when asked to, unlike PostgreSQL"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+@pytest.fixture(scope="session")
+def client():
+    """One TestClient, and one app startup, for the whole session"""
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+_user_ids = itertools.count(1)
+
+
+def register_user(client):
+    """Register and log in a fresh user, returning its id and Authorization header"""
+    username = f"user{next(_user_ids)}"
+    response = client.post("/api/v1/auth/register", json={
+        "username": username, "email": f"{username}@example.com", "password": "password123"
+    })
+    assert response.status_code == 201
+    user_id = response.json()["id"]
+    response = client.post("/api/v1/auth/login", json={
+        "username": username, "password": "password123"
+    })
+    return user_id, {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture
+def auth_headers(client):
+    """Authorization header of a fresh user"""
+    return register_user(client)[1]
+
+
+@pytest.fixture
+def other_user(client):
+    """Id and Authorization header of a second fresh user"""
+    return register_user(client)
+
+
+@pytest.fixture
+def project_id(client, auth_headers):
+    """A project owned by the ``auth_headers`` user"""
+    response = client.post("/api/v1/projects/", json={"name": "Test project"}, headers=auth_headers)
+    assert response.status_code == 201
+    return response.json()["id"]
+
+
+class FakeResult:
+    def __init__(self, value):
+        self.value = value
+
+    def scalar_one_or_none(self):
+        return self.value
+
+
+class FakeSession:
+    """Answers every query with the same row and counts the queries"""
+
+    def __init__(self, value):
+        self.value = value
+        self.queries = 0
+
+    async def execute(self, statement, params=None):
+        self.queries += 1
+        return FakeResult(self.value)
+
+
+@pytest.fixture
+def fake_db():
+    """Factory of database sessions that return a fixed row"""
+    return FakeSession
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    """An in-memory Redis behind the service caches"""
+    client = fakeredis.FakeAsyncRedis()
+    monkeypatch.setattr(cache, "redis_client", client)
+    return client
@@ -0,0 +1,161 @@
+"""
+Tests for the REST endpoints against the test database
+"""
+
+from datetime import datetime
+
+import pytest
+from sqlalchemy import update
+
+from app.core.database import engine
+from app.models.media import ChatMessage
+from app.services.media import get_media_service
+from main import app
+
+API = "/api/v1"
+
+
+class FakeMediaService:
+    """Stands in for MinIO; object deletes always succeed"""
+
+    async def delete_file(self, file_key: str) -> bool:
+        return True
+
+
+@pytest.fixture
+def media_service():
+    app.dependency_overrides[get_media_service] = FakeMediaService
+    yield
+    del app.dependency_overrides[get_media_service]
+
+
+def test_project_etag_not_modified(client, auth_headers, project_id):
+    """Test a matching If-None-Match gets 304 until the project changes"""
+    url = f"{API}/projects/{project_id}"
+    etag = client.get(url, headers=auth_headers).headers["etag"]
+    
+    response = client.get(url, headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    
+    client.put(url, json={"description": "changed"}, headers=auth_headers)
+    response = client.get(url, headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+
+def test_update_returns_new_updated_at(client, auth_headers, project_id):
+    """Test project and clip updates return the updated_at they stored"""
+    url = f"{API}/projects/{project_id}"
+    before = client.get(url, headers=auth_headers).json()
+    updated = client.put(url, json={"description": "d"}, headers=auth_headers).json()
+    assert updated["description"] == "d"
+    assert updated["updated_at"] != before["updated_at"]
+    assert updated["updated_at"] == client.get(url, headers=auth_headers).json()["updated_at"]
+    
+    clip = client.post(f"{API}/timeline/", json={
+        "project_id": project_id, "clip_type": "video",
+        "start_time": 0, "duration": 1, "track_number": 0
+    }, headers=auth_headers).json()
+    url = f"{API}/timeline/{clip['id']}"
+    updated = client.put(url, json={"duration": 3}, headers=auth_headers).json()
+    assert updated["duration"] == 3
+    assert updated["updated_at"] != clip["updated_at"]
+    assert updated["updated_at"] == client.get(url, headers=auth_headers).json()["updated_at"]
+
+
+def test_chat_pages_cover_shared_timestamps(client, auth_headers, project_id):
+    """Test keyset pages neither skip nor repeat messages sharing a timestamp"""
+    ids = [
+        client.post(f"{API}/chat/", json={"project_id": project_id, "message": f"m{i}"},
+                    headers=auth_headers).json()["id"]
+        for i in range(5)
+    ]
+    with engine.begin() as conn:
+        conn.execute(
+            update(ChatMessage).where(ChatMessage.project_id == project_id)
+            .values(created_at=datetime(2024, 1, 1))
+        )
+    
+    seen, params = [], {"limit": 2}
+    while True:
+        page = client.get(f"{API}/chat/project/{project_id}", params=params,
+                          headers=auth_headers).json()
+        seen.extend(message["id"] for message in page["messages"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+        params = {"limit": 2, "before": cursor["created_at"], "before_id": cursor["id"]}
+    
+    assert seen == sorted(ids, reverse=True)
+
+
+def test_chat_page_limit_is_validated(client, auth_headers, project_id):
+    """Test a page size below one is rejected instead of failing"""
+    response = client.get(f"{API}/chat/project/{project_id}", params={"limit": 0},
+                          headers=auth_headers)
+    assert response.status_code == 422
+
+
+def test_delete_media_used_by_clip(client, auth_headers, project_id, media_service):
+    """Test deleting media a clip references detaches the clip instead of failing"""
+    media = client.post(f"{API}/media/confirm", params={
+        "filename": "a.mp4", "file_key": "k", "project_id": project_id,
+        "content_type": "video/mp4", "file_size": 10
+    }, headers=auth_headers).json()
+    clip = client.post(f"{API}/timeline/", json={
+        "project_id": project_id, "media_file_id": media["id"], "clip_type": "video",
+        "start_time": 0, "duration": 1, "track_number": 0
+    }, headers=auth_headers).json()
+    
+    response = client.delete(f"{API}/media/{media['id']}", headers=auth_headers)
+    assert response.status_code == 204
+    assert client.get(f"{API}/media/{media['id']}", headers=auth_headers).status_code == 404
+    
+    response = client.get(f"{API}/timeline/{clip['id']}", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["media_file_id"] is None
+
+
+def test_delete_project_with_content(client, auth_headers, project_id, other_user, media_service):
+    """Test deleting a project removes its members and content with it"""
+    member_id, member_headers = other_user
+    client.post(f"{API}/projects/{project_id}/members",
+                params={"user_id": member_id, "role": "editor"}, headers=auth_headers)
+    client.post(f"{API}/chat/", json={"project_id": project_id, "message": "hi"},
+                headers=member_headers)
+    media = client.post(f"{API}/media/confirm", params={
+        "filename": "a.mp4", "file_key": "k", "project_id": project_id,
+        "content_type": "video/mp4", "file_size": 10
+    }, headers=auth_headers).json()
+    client.post(f"{API}/timeline/", json={
+        "project_id": project_id, "media_file_id": media["id"], "clip_type": "video",
+        "start_time": 0, "duration": 1, "track_number": 0
+    }, headers=auth_headers)
+    
+    # Only the owner may delete, and a refused delete leaves everything in place
+    response = client.delete(f"{API}/projects/{project_id}", headers=member_headers)
+    assert response.status_code == 404
+    assert client.get(f"{API}/projects/{project_id}", headers=member_headers).status_code == 200
+    
+    response = client.delete(f"{API}/projects/{project_id}", headers=auth_headers)
+    assert response.status_code == 204
+    assert client.get(f"{API}/projects/{project_id}", headers=auth_headers).status_code == 404
+    assert client.get(f"{API}/media/{media['id']}", headers=auth_headers).status_code == 404
+    assert client.get(f"{API}/projects/", headers=member_headers).json()["total"] == 0
+
+
+def test_add_duplicate_member(client, auth_headers, project_id, other_user):
+    """Test adding an existing member is rejected and leaves the role unchanged"""
+    member_id, member_headers = other_user
+    url = f"{API}/projects/{project_id}/members"
+    
+    response = client.post(url, params={"user_id": member_id, "role": "viewer"}, headers=auth_headers)
+    assert response.status_code == 200
+    response = client.post(url, params={"user_id": member_id, "role": "editor"}, headers=auth_headers)
+    assert response.status_code == 400
+    
+    # Still a viewer, so edits are refused
+    response = client.put(f"{API}/projects/{project_id}", json={"description": "d"},
+                          headers=member_headers)
+    assert response.status_code == 403
@@ -0,0 +1,61 @@
+"""
+Tests for the cached access token lookup
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.auth import create_access_token, get_user_claims, invalidate_token
+
+USER = SimpleNamespace(id=7, username="alice")
+
+
+@pytest.mark.asyncio
+async def test_claims_are_cached(redis, fake_db):
+    """Test a token is resolved once and then served from Redis until it expires"""
+    db = fake_db(USER)
+    token = create_access_token({"sub": "alice"})
+    
+    claims = await get_user_claims(db, token)
+    assert (claims.user_id, claims.username) == (7, "alice")
+    assert await get_user_claims(db, token) == claims
+    assert db.queries == 1
+    
+    keys = await redis.keys("jwt:*")
+    assert len(keys) == 1
+    assert token.encode() not in keys[0]
+    assert await redis.ttl(keys[0]) > 0
+
+
+@pytest.mark.asyncio
+async def test_invalid_token_is_not_cached(redis, fake_db):
+    """Test a token that fails verification is rejected and never cached"""
+    db = fake_db(USER)
+    
+    assert await get_user_claims(db, "not-a-jwt") is None
+    assert db.queries == 0
+    assert await redis.keys("jwt:*") == []
+
+
+@pytest.mark.asyncio
+async def test_invalidate_token(redis, fake_db):
+    """Test an invalidated token is looked up again"""
+    db = fake_db(USER)
+    token = create_access_token({"sub": "alice"})
+    
+    await get_user_claims(db, token)
+    await invalidate_token(token)
+    await get_user_claims(db, token)
+    assert db.queries == 2
+
+
+@pytest.mark.asyncio
+async def test_redis_error_falls_back_to_database(fake_db):
+    """Test tokens resolve from the database when Redis is unreachable"""
+    db = fake_db(USER)
+    token = create_access_token({"sub": "alice"})
+    
+    assert (await get_user_claims(db, token)).user_id == 7
+    assert (await get_user_claims(db, token)).user_id == 7
+    assert db.queries == 2
@@ -0,0 +1,63 @@
+"""
+Tests for the WebSocket wire codecs
+"""
+
+import zlib
+
+import msgspec
+import pytest
+
+from app.api.schemas import CursorPosition, CursorUpdateMessage, PingMessage
+from app.websockets.codec import JSON_CODEC, MSGPACK_CODEC, MSGPACK_DEFLATE_CODEC
+
+CODECS = [JSON_CODEC, MSGPACK_CODEC, MSGPACK_DEFLATE_CODEC]
+
+
+def load(codec, frame):
+    """Decode a server frame into plain Python values"""
+    if codec is JSON_CODEC:
+        return msgspec.json.decode(frame)
+    if codec.compress:
+        frame = zlib.decompress(frame)
+    return msgspec.msgpack.decode(frame)
+
+
+@pytest.mark.parametrize("codec", CODECS, ids=lambda codec: codec.subprotocol or "json")
+def test_encode_round_trip(codec):
+    """Test encoded frames carry the message, with cursors as fixed-order arrays"""
+    message = {"type": "cursors", "items": [CursorPosition(1, 2.5, 3.0, None)]}
+    frame = codec.encode(message)
+    
+    assert isinstance(frame, bytes if codec.binary else str)
+    assert load(codec, frame) == {"type": "cursors", "items": [[1, 2.5, 3.0, None]]}
+
+
+@pytest.mark.parametrize("codec", CODECS, ids=lambda codec: codec.subprotocol or "json")
+def test_join_builds_array_frame(codec):
+    """Test joined frames decode as one array of the original messages"""
+    messages = [{"type": "pong", "timestamp": float(i)} for i in range(20)]
+    frame = codec.join([codec.encode(message) for message in messages])
+    
+    assert load(codec, frame) == messages
+
+
+@pytest.mark.parametrize("codec", CODECS, ids=lambda codec: codec.subprotocol or "json")
+def test_decode_client_messages(codec):
+    """Test client frames decode into the tagged message structs"""
+    frame = codec.encode({"type": "cursor_update", "x": 1, "y": 2})
+    
+    assert codec.decode(frame) == CursorUpdateMessage(x=1, y=2)
+    assert codec.decode(codec.encode({"type": "ping"})) == PingMessage()
+
+
+@pytest.mark.parametrize("codec", CODECS, ids=lambda codec: codec.subprotocol or "json")
+def test_decode_rejects_unknown_type(codec):
+    """Test an unknown message type is a validation error"""
+    with pytest.raises(msgspec.ValidationError):
+        codec.decode(codec.encode({"type": "bogus"}))
+
+
+def test_deflate_rejects_uncompressed_frame():
+    """Test a msgpack-deflate frame that is not deflated is a decode error"""
+    with pytest.raises(msgspec.DecodeError):
+        MSGPACK_DEFLATE_CODEC.decode(MSGPACK_CODEC.encode({"type": "ping"}))
@@ -0,0 +1,23 @@
+"""
+Tests for the queued logging setup
+"""
+
+import logging
+from logging.handlers import QueueHandler
+
+from app.core.logging import setup_logging, shutdown_logging
+
+
+def queue_handlers():
+    return [h for h in logging.getLogger("app").handlers if isinstance(h, QueueHandler)]
+
+
+def test_setup_and_shutdown_pair_up(client):
+    """Test each cycle installs one queue handler and removes it again"""
+    for _ in range(2):
+        shutdown_logging()
+        assert queue_handlers() == []
+        
+        setup_logging()
+        setup_logging()
+        assert len(queue_handlers()) == 1
@@ -3,27 +3,23 @@ Basic tests for the FastAPI application
 """
 
 import pytest
-from fastapi.testclient import TestClient
-from main import app
 
-client = TestClient(app)
 
-
-def test_health_check():
+def test_health_check(client):
     """Test health check endpoint"""
     response = client.get("/health")
     assert response.status_code == 200
     assert response.json()["status"] == "healthy"
 
 
-def test_root_endpoint():
+def test_root_endpoint(client):
     """Test root endpoint"""
     response = client.get("/")
     assert response.status_code == 200
     assert "Collaborative Video Editor API" in response.json()["message"]
 
 
-def test_api_docs():
+def test_api_docs(client):
     """Test API documentation endpoints"""
     response = client.get("/docs")
     assert response.status_code == 200
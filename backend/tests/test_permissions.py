@@ -0,0 +1,61 @@
+"""
+Tests for the cached project role lookup
+"""
+
+import pytest
+
+from app.services.permissions import (
+    get_member_role, invalidate_member_role, invalidate_project_roles
+)
+
+
+@pytest.mark.asyncio
+async def test_role_is_cached(redis, fake_db):
+    """Test a miss reads the database and the next lookup is served from Redis"""
+    db = fake_db("editor")
+    
+    assert await get_member_role(db, 1, 10) == "editor"
+    assert await get_member_role(db, 1, 10) == "editor"
+    assert db.queries == 1
+    assert await redis.hget("perm:10", "1") == b"editor"
+    assert 0 < await redis.ttl("perm:10") <= 60
+
+
+@pytest.mark.asyncio
+async def test_non_membership_is_cached(redis, fake_db):
+    """Test a user outside the project is cached as a miss too"""
+    db = fake_db(None)
+    
+    assert await get_member_role(db, 2, 10) is None
+    assert await get_member_role(db, 2, 10) is None
+    assert db.queries == 1
+
+
+@pytest.mark.asyncio
+async def test_invalidation(redis, fake_db):
+    """Test invalidating one member or the whole project forces a new read"""
+    db = fake_db("viewer")
+    for user_id in (1, 2):
+        await get_member_role(db, user_id, 10)
+    await get_member_role(db, 1, 11)
+    
+    await invalidate_member_role(1, 10)
+    assert await redis.hkeys("perm:10") == [b"2"]
+    
+    await invalidate_project_roles(10)
+    assert not await redis.exists("perm:10")
+    assert await redis.exists("perm:11")
+    
+    await get_member_role(db, 2, 10)
+    assert db.queries == 4
+
+
+@pytest.mark.asyncio
+async def test_redis_error_falls_back_to_database(fake_db):
+    """Test every lookup reads the database when Redis is unreachable"""
+    db = fake_db("owner")
+    
+    assert await get_member_role(db, 1, 10) == "owner"
+    assert await get_member_role(db, 1, 10) == "owner"
+    assert db.queries == 2
+    await invalidate_project_roles(10)
@@ -0,0 +1,41 @@
+"""
+Tests for the project WebSocket handshake
+"""
+
+import pytest
+from fastapi import WebSocketDisconnect
+
+WS = "/api/v1/ws/project"
+
+
+def assert_rejected(client, url, reason):
+    with pytest.raises(WebSocketDisconnect) as excinfo:
+        with client.websocket_connect(url):
+            pass
+    assert excinfo.value.code == 1008
+    assert excinfo.value.reason == reason
+
+
+def test_missing_token_is_rejected(client, project_id):
+    """Test a handshake without a token is refused with a policy violation"""
+    assert_rejected(client, f"{WS}/{project_id}", "Authentication token required")
+
+
+def test_invalid_token_is_rejected(client, project_id):
+    """Test a handshake with a bad token is refused with a policy violation"""
+    assert_rejected(client, f"{WS}/{project_id}?token=bogus", "Invalid authentication token")
+
+
+def test_non_member_is_rejected(client, project_id, other_user):
+    """Test a user outside the project is refused with a policy violation"""
+    token = other_user[1]["Authorization"].split()[1]
+    assert_rejected(
+        client, f"{WS}/{project_id}?token={token}", "Project not found or access denied"
+    )
+
+
+def test_member_receives_project_state(client, auth_headers, project_id):
+    """Test a member's handshake is accepted and starts with the project state"""
+    token = auth_headers["Authorization"].split()[1]
+    with client.websocket_connect(f"{WS}/{project_id}?token={token}") as websocket:
+        assert websocket.receive_json()["type"] == "project_state"
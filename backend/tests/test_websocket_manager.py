@@ -0,0 +1,195 @@
+"""
+Tests for the WebSocket connection manager
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from app.api.schemas import CursorUpdateMessage
+from app.websockets.codec import JSON_CODEC
+from app.websockets.manager import (
+    CLOSE_TRY_AGAIN_LATER, CURSOR_FLUSH_INTERVAL, QUEUE_MAX_FRAMES, ConnectionManager
+)
+
+
+class FakeWebSocket:
+    """Records the frames written to it; sends block while ``paused`` is clear"""
+
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.paused = asyncio.Event()
+        self.paused.set()
+        self.sent = []
+        self.close_code = None
+
+    async def send_text(self, data: str):
+        await self.paused.wait()
+        if self.fail:
+            raise RuntimeError("connection lost")
+        self.sent.append(json.loads(data))
+
+    async def close(self, code: int = 1000):
+        self.close_code = code
+
+    def messages(self):
+        """Sent messages with batch frames flattened"""
+        out = []
+        for frame in self.sent:
+            out.extend(frame if isinstance(frame, list) else [frame])
+        return out
+
+
+async def settle():
+    """Let writer and close tasks run"""
+    await asyncio.sleep(0.01)
+
+
+async def join(manager, websocket, user_id, project_id=1):
+    await manager.connect(
+        websocket, project_id, {"id": user_id, "username": f"user{user_id}"}, JSON_CODEC
+    )
+
+
+@pytest.mark.asyncio
+async def test_client_too_far_behind_is_closed():
+    """Test a client whose queue overflows is dropped and told to reconnect"""
+    manager = ConnectionManager()
+    stalled = FakeWebSocket()
+    stalled.paused.clear()
+    await join(manager, stalled, 1)
+    await settle()
+    
+    for i in range(QUEUE_MAX_FRAMES + 2):
+        await manager.broadcast_to_project(1, {"type": "n", "i": i})
+    await settle()
+    
+    assert stalled not in manager.connection_users
+    assert 1 not in manager.active_connections
+    assert stalled.close_code == CLOSE_TRY_AGAIN_LATER
+
+
+@pytest.mark.asyncio
+async def test_failed_send_closes_client():
+    """Test a client whose send fails is dropped and its socket closed"""
+    manager = ConnectionManager()
+    healthy, broken = FakeWebSocket(), FakeWebSocket(fail=True)
+    await join(manager, healthy, 1)
+    await join(manager, broken, 2)
+    await settle()
+    
+    assert broken not in manager.connection_users
+    assert broken.close_code == CLOSE_TRY_AGAIN_LATER
+    assert healthy in manager.connection_users
+    assert healthy.close_code is None
+    manager.disconnect(healthy)
+
+
+def cursor_items(websocket):
+    return [
+        item
+        for message in websocket.messages() if message["type"] == "cursors"
+        for item in message["items"]
+    ]
+
+
+@pytest.mark.asyncio
+async def test_cursor_batch_is_shared():
+    """Test every client gets the same batch, except a lone mover who gets none"""
+    manager = ConnectionManager()
+    a, b, c = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+    for user_id, websocket in enumerate((a, b, c), start=1):
+        await join(manager, websocket, user_id)
+    await settle()
+    
+    await manager.handle_cursor_update(a, CursorUpdateMessage(x=1, y=1))
+    await manager.handle_cursor_update(b, CursorUpdateMessage(x=2, y=2))
+    await asyncio.sleep(CURSOR_FLUSH_INTERVAL * 2)
+    
+    both = [[1, 1.0, 1.0, None], [2, 2.0, 2.0, None]]
+    for websocket in (a, b, c):
+        assert sorted(cursor_items(websocket)) == both
+    
+    await manager.handle_cursor_update(a, CursorUpdateMessage(x=5, y=5))
+    await asyncio.sleep(CURSOR_FLUSH_INTERVAL * 2)
+    assert len(cursor_items(a)) == 2
+    assert cursor_items(b)[-1] == cursor_items(c)[-1] == [1, 5.0, 5.0, None]
+    
+    for websocket in (a, b, c):
+        manager.disconnect(websocket)
+    # The flusher stops once the room is empty
+    await asyncio.sleep(CURSOR_FLUSH_INTERVAL * 2)
+    assert manager._cursor_flusher.done()
+
+
+@pytest.mark.asyncio
+async def test_writer_batches_queued_frames():
+    """Test frames queued behind a slow send go out as one array frame"""
+    manager = ConnectionManager()
+    websocket = FakeWebSocket()
+    await join(manager, websocket, 1)
+    await settle()
+    websocket.paused.clear()
+    
+    await manager.broadcast_to_project(1, {"type": "n", "i": 0})
+    await settle()
+    for i in range(1, 4):
+        await manager.broadcast_to_project(1, {"type": "n", "i": i})
+    await settle()
+    websocket.paused.set()
+    await settle()
+    
+    # project_state, then the send in flight, then the rest merged into one
+    assert websocket.sent[1] == {"type": "n", "i": 0}
+    assert websocket.sent[2] == [{"type": "n", "i": i} for i in range(1, 4)]
+    manager.disconnect(websocket)
+
+
+@pytest.mark.asyncio
+async def test_cursor_updates_are_coalesced():
+    """Test many updates within one interval reach others as one latest position"""
+    manager = ConnectionManager()
+    mover, watcher = FakeWebSocket(), FakeWebSocket()
+    await join(manager, mover, 1)
+    await join(manager, watcher, 2)
+    await settle()
+    
+    for i in range(10):
+        await manager.handle_cursor_update(mover, CursorUpdateMessage(x=i, y=i))
+    await asyncio.sleep(CURSOR_FLUSH_INTERVAL * 2)
+    
+    assert cursor_items(watcher) == [[1, 9.0, 9.0, None]]
+    manager.disconnect(mover)
+    manager.disconnect(watcher)
+    await asyncio.sleep(CURSOR_FLUSH_INTERVAL * 2)
+
+
+@pytest.mark.asyncio
+async def test_lagging_client_gets_latest_cursor_once_drained():
+    """Test a client with a backlog skips cursor batches, then gets the latest position"""
+    manager = ConnectionManager()
+    mover, lagging = FakeWebSocket(), FakeWebSocket()
+    await join(manager, mover, 1)
+    await join(manager, lagging, 2)
+    await settle()
+    
+    # One frame in flight and one queued behind it
+    lagging.paused.clear()
+    await manager.broadcast_to_project(1, {"type": "n", "i": 0})
+    await settle()
+    await manager.broadcast_to_project(1, {"type": "n", "i": 1})
+    
+    for i in range(3):
+        await manager.handle_cursor_update(mover, CursorUpdateMessage(x=i, y=i))
+        await asyncio.sleep(CURSOR_FLUSH_INTERVAL * 2)
+    assert manager.connection_users[lagging]["stale_cursors"] == {1}
+    
+    lagging.paused.set()
+    await settle()
+    
+    assert cursor_items(lagging) == [[1, 2.0, 2.0, None]]
+    assert not manager.connection_users[lagging]["stale_cursors"]
+    manager.disconnect(mover)
+    manager.disconnect(lagging)
+    await asyncio.sleep(CURSOR_FLUSH_INTERVAL * 2)